@@ -0,0 +1,103 @@
+import argparse
+import gzip
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+
+from alvya import SAMPLER, system_usage
+
+class Rejected(Exception):
+    pass
+
+class Agent:
+    def __init__(self, node, send, batch=60, flush_interval=10, max_buffer=100000):
+        self.node = node
+        self.send = send
+        self.batch = batch
+        self.flush_interval = flush_interval
+        # samples that could not be delivered are kept up to max_buffer, oldest dropped first
+        self.buffer = deque(maxlen=max_buffer)
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+
+    def collect(self):
+        usage = system_usage()
+        with self.lock:
+            self.buffer.append((time.time(), usage["cpu"], usage["gpu"], usage["memory"]))
+        if len(self.buffer) >= self.batch or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def payload(self, samples):
+        times, cpu, gpu, memory = zip(*samples)
+        body = {"node": self.node, "samples": {"time": times, "cpu": cpu, "gpu": gpu, "memory": memory}}
+        return gzip.compress(json.dumps(body, separators=(",", ":")).encode())
+
+    def flush(self):
+        # uploads the backlog oldest first, one batch per request
+        self.last_flush = time.monotonic()
+        sent = 0
+        while True:
+            with self.lock:
+                samples = [self.buffer.popleft() for _ in range(min(self.batch, len(self.buffer)))]
+            if not samples:
+                return sent
+            try:
+                self.send(self.payload(samples))
+            except Rejected:
+                # the server will never take this batch, and retrying it would hold back everything newer
+                self.dropped += len(samples)
+                continue
+            except Exception:
+                with self.lock:
+                    # back in front of newer samples; if the buffer filled meanwhile, the oldest ones give way
+                    room = self.buffer.maxlen - len(self.buffer)
+                    self.buffer.extendleft(reversed(samples[len(samples) - room:] if room < len(samples) else samples))
+                raise
+            sent += len(samples)
+
+    def run(self, interval=None):
+        interval = SAMPLER.interval if interval is None else interval
+        while True:
+            started = time.monotonic()
+            try:
+                self.collect()
+            except Exception as error:
+                print("alvya agent: %s" % error)
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+
+def http_sender(url, timeout=10):
+    def send(body):
+        req = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as error:
+            if 400 <= error.code < 500:
+                raise Rejected(error.read().decode(errors="replace"))
+            raise
+    return send
+
+def client_sender(client, path="/ingest"):
+    # posts through a Flask test client, so agents can be exercised without a network
+    def send(body):
+        response = client.post(path, data=body, headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+        if 400 <= response.status_code < 500:
+            raise Rejected(response.get_json())
+        if response.status_code != 200:
+            raise RuntimeError(response.get_json())
+        return response.get_json()
+    return send
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Push this host's usage to a central Alvya server")
+    parser.add_argument("--server", default="http://127.0.0.1:5000", help="base URL of the central server")
+    parser.add_argument("--node", default=__import__("socket").gethostname(), help="name this host reports as")
+    parser.add_argument("--interval", type=float, default=None, help="seconds between samples")
+    parser.add_argument("--batch", type=int, default=60, help="samples per upload")
+    parser.add_argument("--flush-interval", type=float, default=10, help="longest seconds between uploads")
+    args = parser.parse_args()
+    Agent(args.node, http_sender(args.server.rstrip("/") + "/ingest"), args.batch, args.flush_interval).run(args.interval)
@@ -1,11 +1,32 @@
-from flask import Flask, render_template_string, request
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, g, request
+import bisect
+import fcntl
+import functools
+import gzip
+import hashlib
+import json
+import math
+import numpy as np
+import os
 import psutil
+import re
+import sys
+import threading
 import time
+import uuid
+import zlib
 import pandas as pd
 
+try:
+    import GPUtil
+except ImportError:
+    GPUtil = None
+
 app = Flask(__name__)
 
-# TASKS and HISTORY DataFrames
+# TASKS DataFrame (HISTORY is the on-disk HistoryStore below)
 TASKS = pd.DataFrame({
     "tid": [1, 2, 3, 4],
     "tname": ["Render", "Clean Data", "Train Model", "Browse"],
@@ -14,151 +35,2079 @@ TASKS = pd.DataFrame({
     "emem": [70, 30, 80, 15]
 })
 
-HISTORY = pd.DataFrame({
-    "time": ["2025-03-05 10:00", "2025-03-05 11:00"],
-    "tid": [1, 2],
-    "acpu": [82, 38],
-    "agpu": [90, 12],
-    "amem": [65, 28],
-    "dur": [45, 20]
-})
+# Sampler settings (seconds between samples, default averaging window, ring buffer size)
+SAMPLE_INTERVAL = float(os.environ.get("ALVYA_SAMPLE_INTERVAL", 1))
+SAMPLE_WINDOW = float(os.environ.get("ALVYA_SAMPLE_WINDOW", 2))
+SAMPLE_CAPACITY = int(os.environ.get("ALVYA_SAMPLE_CAPACITY", 3600))
+
+# Live stream settings (samples buffered per subscriber before the oldest are dropped, keep-alive seconds)
+STREAM_BUFFER = int(os.environ.get("ALVYA_STREAM_BUFFER", 16))
+STREAM_HEARTBEAT = float(os.environ.get("ALVYA_STREAM_HEARTBEAT", 15))
+
+# History store settings (directory, seconds per segment file, seconds of history kept, seconds a record may be late or early)
+HISTORY_DIR = os.environ.get("ALVYA_HISTORY_DIR", "history")
+HISTORY_SEGMENT = int(os.environ.get("ALVYA_HISTORY_SEGMENT", 3600))
+HISTORY_RETENTION = int(os.environ.get("ALVYA_HISTORY_RETENTION", 30 * 86400))
+HISTORY_FSYNC = os.environ.get("ALVYA_HISTORY_FSYNC", "0") == "1"
+HISTORY_SKEW = float(os.environ.get("ALVYA_HISTORY_SKEW", 60))
+
+# Rollup tiers as (directory name, bucket seconds, seconds of buckets kept), finest first
+ROLLUP_TIERS = [
+    ("1min", 60, int(os.environ.get("ALVYA_ROLLUP_MINUTE_RETENTION", 90 * 86400))),
+    ("1h", 3600, int(os.environ.get("ALVYA_ROLLUP_HOUR_RETENTION", 3 * 365 * 86400))),
+]
+
+# Monitoring job settings (concurrent jobs, queued jobs, seconds results are kept, longest dur accepted)
+JOB_WORKERS = int(os.environ.get("ALVYA_JOB_WORKERS", 4))
+JOB_QUEUE = int(os.environ.get("ALVYA_JOB_QUEUE", 32))
+JOB_TTL = float(os.environ.get("ALVYA_JOB_TTL", 600))
+JOB_MAX_DUR = int(os.environ.get("ALVYA_JOB_MAX_DUR", 300))
+JOB_DIR = os.environ.get("ALVYA_JOB_DIR", os.path.join(HISTORY_DIR, "jobs"))
+
+# Fleet ingestion settings (per-node stores, seconds kept per node, seconds averaged for a node's usage, buffer shards, seconds a node's clock may run ahead)
+NODE_DIR = os.environ.get("ALVYA_NODE_DIR", os.path.join(HISTORY_DIR, "nodes"))
+NODE_RETENTION = int(os.environ.get("ALVYA_NODE_RETENTION", 86400))
+NODE_WINDOW = float(os.environ.get("ALVYA_NODE_WINDOW", 300))
+NODE_SHARDS = int(os.environ.get("ALVYA_NODE_SHARDS", 16))
+NODE_CAPACITY = int(os.environ.get("ALVYA_NODE_CAPACITY", 3600))
+NODE_SKEW = float(os.environ.get("ALVYA_NODE_SKEW", 300))
+
+# Per-task process tracking (bindings file shared by workers, samples kept per task, most tasks tracked)
+TRACK_BINDINGS = os.environ.get("ALVYA_TRACK_BINDINGS", os.path.join(HISTORY_DIR, "bindings.json"))
+TRACK_CAPACITY = int(os.environ.get("ALVYA_TRACK_CAPACITY", 600))
+TRACK_LIMIT = int(os.environ.get("ALVYA_TRACK_LIMIT", 1024))
+
+# Learned profile settings (history rows before a task's learned usage replaces the catalog numbers, histogram bins per metric, seconds between syncs with the history store)
+PROFILE_MIN_SAMPLES = int(os.environ.get("ALVYA_PROFILE_MIN_SAMPLES", 5))
+PROFILE_BINS = int(os.environ.get("ALVYA_PROFILE_BINS", 200))
+PROFILE_SYNC = float(os.environ.get("ALVYA_PROFILE_SYNC", 1))
+
+# Load forecast settings (seconds ahead, half-lives in seconds of the smoothed level and trend)
+FORECAST_HORIZON = float(os.environ.get("ALVYA_FORECAST_HORIZON", 300))
+FORECAST_LEVEL_HALFLIFE = float(os.environ.get("ALVYA_FORECAST_LEVEL_HALFLIFE", 30))
+FORECAST_TREND_HALFLIFE = float(os.environ.get("ALVYA_FORECAST_TREND_HALFLIFE", 120))
+
+# Instrumentation settings (timers and request histograms on/off, per-worker metric files, series per worker, ?profile=1 on/off, profiler seconds between stack samples)
+METRICS_ENABLED = os.environ.get("ALVYA_METRICS", "0") == "1"
+METRICS_DIR = os.environ.get("ALVYA_METRICS_DIR", os.path.join(HISTORY_DIR, "metrics"))
+METRICS_SERIES = int(os.environ.get("ALVYA_METRICS_SERIES", 512))
+METRICS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PROFILE_ENABLED = os.environ.get("ALVYA_PROFILE", "0") == "1"
+PROFILE_INTERVAL = float(os.environ.get("ALVYA_PROFILE_INTERVAL", 0.005))
 
 # Backend Functions
-def system_usage():
+class Metrics:
+    # each worker owns a memory-mapped table of series, so a scrape on any worker sees every worker's counts
+    def __init__(self, path=METRICS_DIR, capacity=METRICS_SERIES, buckets=METRICS_BUCKETS):
+        self.path = path
+        self.capacity = capacity
+        self.buckets = list(buckets)
+        self.width = len(self.buckets) + 3
+        self.rows = {}
+        self.names = []
+        self.table = None
+        self.cells = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def files(self, pid):
+        base = os.path.join(self.path, str(pid))
+        return base + ".metrics", base + ".json"
+
+    def attach(self):
+        # gunicorn forks workers after import, so each process maps its own file
+        self.pid = os.getpid()
+        table_file, names_file = self.files(self.pid)
+        os.makedirs(self.path, exist_ok=True)
+        try:
+            with open(names_file) as f:
+                self.names = [tuple(entry) for entry in json.load(f)]
+        except (FileNotFoundError, ValueError):
+            self.names = []
+        self.rows = {(name, tuple(labels.items())): row for row, (name, labels, kind) in enumerate(self.names)}
+        with open(table_file, "ab") as f:
+            f.truncate(max(os.path.getsize(table_file), self.capacity * self.width * 8))
+        self.table = np.memmap(table_file, dtype=np.float64, mode="r+", shape=(self.capacity, self.width))
+        # a flat memoryview of the mapping updates single cells without numpy's per-index overhead
+        self.cells = memoryview(self.table).cast("B").cast("d")
+
+    def row(self, name, labels, kind):
+        if self.pid != os.getpid():
+            self.attach()
+        key = (name, labels)
+        row = self.rows.get(key)
+        if row is None:
+            if len(self.names) >= self.capacity:
+                return None
+            row = self.rows[key] = len(self.names)
+            self.names.append((name, dict(labels), kind))
+            names_file = self.files(self.pid)[1]
+            tmp = names_file + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.names, f)
+            os.replace(tmp, names_file)
+        return row
+
+    def observe(self, name, labels, seconds):
+        with self.lock:
+            row = self.row(name, labels, "histogram")
+            if row is None:
+                return
+            cells = self.cells
+            base = row * self.width
+            cells[base] += 1
+            cells[base + 1] += seconds
+            cells[base + 2 + bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def set(self, name, labels, value):
+        with self.lock:
+            row = self.row(name, labels, "gauge")
+            if row is not None:
+                self.cells[row * self.width + 1] = value
+
+    def collect(self):
+        histograms = {}
+        gauges = []
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            # only <pid>.json belongs to a worker; anything else in the directory is not ours to read
+            if not name.endswith(".json") or not name[:-5].isdigit():
+                continue
+            pid = int(name[:-5])
+            table_file, names_file = self.files(pid)
+            try:
+                with open(names_file) as f:
+                    series = json.load(f)
+                table = np.fromfile(table_file, dtype=np.float64).reshape(-1, self.width)
+            except (FileNotFoundError, ValueError):
+                continue
+            # counts from exited workers still add up; their gauges are dropped
+            alive = psutil.pid_exists(pid)
+            for row, (metric, labels, kind) in enumerate(series[:len(table)]):
+                if kind == "histogram":
+                    key = (metric, tuple(sorted(labels.items())))
+                    histograms[key] = histograms.get(key, 0) + table[row]
+                elif alive:
+                    gauges.append((metric, dict(labels, worker=str(pid)), table[row, 1]))
+        return histograms, gauges
+
+METRICS = Metrics()
+
+METRIC_HELP = {
+    "alvya_request_duration_seconds": ("histogram", "Time spent handling a request, by route, method and status"),
+    "alvya_function_duration_seconds": ("histogram", "Time spent in an instrumented hot-path function"),
+    "alvya_sampler_lag_seconds": ("gauge", "How long the latest sample took to publish beyond the sampling interval"),
+    "alvya_sampler_last_sample_timestamp_seconds": ("gauge", "Epoch seconds of the latest sample taken by the worker's sampler"),
+    "alvya_history_records": ("gauge", "Records in the history store"),
+    "alvya_history_bytes": ("gauge", "Bytes used by the history store's segment files"),
+    "alvya_history_segments": ("gauge", "Segment files in the history store"),
+    "alvya_metrics_enabled": ("gauge", "Whether timers and request histograms are recorded (ALVYA_METRICS)"),
+}
+
+def timed(function):
+    # with ALVYA_METRICS off the function is returned untouched, so disabled timers cost nothing
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+        labels = (("function", function),)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                METRICS.observe("alvya_function_duration_seconds", labels, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+def metric_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in labels.values())
+    return "{%s}" % ",".join('%s="%s"' % (k, v) for k, v in zip(labels, escaped))
+
+def metric_value(value):
+    value = float(value)
+    return repr(int(value)) if value.is_integer() else repr(value)
+
+def prometheus_text(histograms, gauges):
+    families = {}
+    for (name, labels), values in sorted(histograms.items()):
+        labels = dict(labels)
+        lines = families.setdefault(name, [])
+        cumulative = np.cumsum(values[2:])
+        for bound, count in zip(METRICS.buckets + ["+Inf"], cumulative.tolist()):
+            lines.append("%s_bucket%s %s" % (name, metric_labels(dict(labels, le=str(bound))), metric_value(count)))
+        lines.append("%s_sum%s %s" % (name, metric_labels(labels), metric_value(values[1])))
+        lines.append("%s_count%s %s" % (name, metric_labels(labels), metric_value(values[0])))
+    for name, labels, value in gauges:
+        families.setdefault(name, []).append("%s%s %s" % (name, metric_labels(labels), metric_value(value)))
+    out = []
+    for name, lines in families.items():
+        kind, text = METRIC_HELP.get(name, ("untyped", name))
+        out.append("# HELP %s %s\n# TYPE %s %s\n" % (name, text, name, kind))
+        out.extend(line + "\n" for line in lines)
+    return "".join(out)
+
+class StackSampler:
+    # per-request profiler: samples one thread's stack from a side thread and counts folded stacks
+    def __init__(self, ident, interval=PROFILE_INTERVAL):
+        self.ident = ident
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="alvya-profiler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.ident)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append("%s (%s:%d)" % (code.co_name, os.path.basename(code.co_filename), frame.f_lineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        return "".join("%s %d\n" % item for item in self.stacks.most_common())
+
+def gpu_percent():
+    if GPUtil is None:
+        return 0
+    try:
+        gpus = GPUtil.getGPUs()
+    except Exception:
+        return 0
+    return sum(g.load for g in gpus) / len(gpus) * 100 if gpus else 0
+
+def read_usage(interval):
     return {
-        "cpu": psutil.cpu_percent(interval=1),
-        "gpu": 0,  # Placeholder (add GPUtil if needed)
+        "time": time.time(),
+        "cpu": psutil.cpu_percent(interval=interval),
+        "gpu": gpu_percent(),
         "memory": psutil.virtual_memory().percent
     }
 
-def check_task(tid, tasks_df, dur=2, usage_tolerance=10):
+class Subscription:
+    def __init__(self, sampler, maxlen=STREAM_BUFFER):
+        self.sampler = sampler
+        self.queue = deque(maxlen=maxlen)
+        self.dropped = 0
+
+    def push(self, sample):
+        # a slow reader loses its oldest samples instead of growing the queue
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(sample)
+
+    def get(self, timeout=None):
+        with self.sampler.changed:
+            if not self.queue:
+                self.sampler.changed.wait(timeout)
+            samples = list(self.queue)
+            self.queue.clear()
+        return samples
+
+    def close(self):
+        self.sampler.unsubscribe(self)
+
+class ProcessTracker:
+    def __init__(self, path=TRACK_BINDINGS, capacity=TRACK_CAPACITY, limit=TRACK_LIMIT):
+        self.path = path
+        self.capacity = capacity
+        self.limit = limit
+        self.bindings = {}
+        self.mtime = None
+        self.usage = {}
+        self.procs = {}
+        self.cpu = {}
+        self.cgroups = {}
+        self.last = None
+        self.lock = threading.Lock()
+        self.cpus = psutil.cpu_count() or 1
+        self.total_memory = psutil.virtual_memory().total
+
+    def load(self):
+        # bindings live in a file so every gunicorn worker tracks the same tasks
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self.mtime:
+            return
+        bindings = {}
+        if mtime is not None:
+            try:
+                with open(self.path) as f:
+                    bindings = {int(tid): binding for tid, binding in json.load(f).items()}
+            except (OSError, ValueError):
+                return
+        with self.lock:
+            self.bindings, self.mtime = bindings, mtime
+            for tid in list(self.usage):
+                if tid not in bindings:
+                    del self.usage[tid]
+
+    def save(self, bindings):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = "%s.%d.tmp" % (self.path, os.getpid())
+        with open(tmp, "w") as f:
+            json.dump({str(tid): binding for tid, binding in bindings.items()}, f)
+        os.replace(tmp, self.path)
+        self.mtime = None
+        self.load()
+
+    def bind(self, tid, pid=None, tree=True, cgroup=None):
+        if cgroup is not None:
+            binding = self.cgroup_files(cgroup)
+        elif pid is not None and psutil.pid_exists(pid):
+            binding = {"pid": pid, "tree": bool(tree)}
+        else:
+            raise ValueError("pid %s does not exist" % pid)
+        self.load()
+        with self.lock:
+            bindings = dict(self.bindings)
+        if tid not in bindings and len(bindings) >= self.limit:
+            raise ValueError("already tracking %d tasks" % self.limit)
+        bindings[tid] = binding
+        self.save(bindings)
+        return binding
+
+    def unbind(self, tid):
+        self.load()
+        with self.lock:
+            bindings = dict(self.bindings)
+        if bindings.pop(tid, None) is not None:
+            self.save(bindings)
+
+    def bound(self, tid):
+        with self.lock:
+            return tid in self.bindings
+
+    def children(self):
+        tree = {}
+        for proc in psutil.process_iter(["ppid"]):
+            tree.setdefault(proc.info["ppid"], []).append(proc.pid)
+        return tree
+
+    def cpu_seconds(self, pids):
+        # one /proc read per process per tick, however many tasks share it
+        seconds, rss = {}, {}
+        for pid in pids:
+            proc = self.procs.get(pid)
+            try:
+                if proc is None:
+                    proc = self.procs[pid] = psutil.Process(pid)
+                with proc.oneshot():
+                    times = proc.cpu_times()
+                    seconds[pid] = times.user + times.system
+                    rss[pid] = proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                self.procs.pop(pid, None)
+        return seconds, rss
+
+    def cgroup_files(self, cgroup):
+        cgroup = cgroup.strip("/")
+        for root in ("/sys/fs/cgroup", "/sys/fs/cgroup/unified"):
+            cpu = os.path.join(root, cgroup, "cpu.stat")
+            if os.path.exists(cpu) and cpu != os.path.join(root, "cpu.stat"):
+                return {"cgroup": cgroup, "cpu": cpu, "memory": os.path.join(root, cgroup, "memory.current")}
+        # cgroup v1 keeps cpu and memory accounting in separate hierarchies
+        cpu = os.path.join("/sys/fs/cgroup/cpuacct", cgroup, "cpuacct.usage")
+        if os.path.exists(cpu):
+            return {"cgroup": cgroup, "cpu": cpu, "memory": os.path.join("/sys/fs/cgroup/memory", cgroup, "memory.usage_in_bytes")}
+        raise ValueError("cgroup %s has no cpu accounting" % cgroup)
+
+    def cgroup_usage(self, binding):
+        with open(binding["cpu"]) as f:
+            if binding["cpu"].endswith("cpu.stat"):
+                seconds = next(int(line.split()[1]) for line in f if line.startswith("usage_usec")) / 1e6
+            else:
+                seconds = int(f.read()) / 1e9
+        try:
+            with open(binding["memory"]) as f:
+                memory = int(f.read())
+        except FileNotFoundError:
+            memory = 0
+        return seconds, memory
+
+    def tick(self, sample):
+        self.load()
+        with self.lock:
+            bindings = dict(self.bindings)
+        now = time.monotonic()
+        elapsed, self.last = (None if self.last is None else now - self.last), now
+        if not bindings:
+            self.procs.clear()
+            self.cpu.clear()
+            return
+        tree = self.children() if any(b.get("tree") for b in bindings.values()) else {}
+        members = {}
+        for tid, binding in bindings.items():
+            if "pid" not in binding:
+                continue
+            pids, stack = [], [binding["pid"]]
+            while stack:
+                pid = stack.pop()
+                pids.append(pid)
+                if binding["tree"]:
+                    stack.extend(tree.get(pid, ()))
+            members[tid] = pids
+        previous = self.cpu
+        seconds, rss = self.cpu_seconds({pid for pids in members.values() for pid in pids})
+        self.cpu = seconds
+        for pid in set(self.procs) - set(seconds):
+            del self.procs[pid]
+        readings = {}
+        gone = []
+        for tid, pids in members.items():
+            # once no bound process can be read the task has no readings, so checks fall back to system scope
+            if not any(pid in seconds for pid in pids):
+                gone.append(tid)
+                continue
+            # processes seen for the first time only set a baseline; with no baseline at all there is no reading yet
+            known = [pid for pid in pids if pid in seconds and pid in previous]
+            if not known:
+                continue
+            used = sum(seconds[pid] - previous[pid] for pid in known)
+            memory = sum(rss.get(pid, 0) for pid in pids)
+            readings[tid] = (used, memory)
+        for tid, binding in bindings.items():
+            if "cgroup" in binding:
+                try:
+                    total, memory = self.cgroup_usage(binding)
+                except (OSError, StopIteration, ValueError):
+                    gone.append(tid)
+                    continue
+                previous_total = self.cgroups.get(tid)
+                self.cgroups[tid] = total
+                if previous_total is not None:
+                    readings[tid] = (total - previous_total, memory)
+        with self.lock:
+            for tid in gone:
+                self.usage.pop(tid, None)
+            if not elapsed:
+                return
+            for tid, (used, memory) in readings.items():
+                usage = self.usage.get(tid)
+                if usage is None:
+                    usage = self.usage[tid] = deque(maxlen=self.capacity)
+                usage.append({
+                    "time": sample["time"],
+                    "cpu": round(min(used / (elapsed * self.cpus) * 100, 100), 2),
+                    "gpu": sample["gpu"],
+                    "memory": round(memory / self.total_memory * 100, 2)
+                })
+
+    def recent(self, tid, seconds):
+        with self.lock:
+            usage = self.usage.get(tid)
+            if not usage:
+                return []
+            cutoff = usage[-1]["time"] - seconds
+            return [u for u in usage if u["time"] > cutoff]
+
+    def at(self, tid, sample):
+        with self.lock:
+            for usage in reversed(self.usage.get(tid, ())):
+                if usage["time"] == sample["time"]:
+                    return usage
+                if usage["time"] < sample["time"]:
+                    break
+        return None
+
+TRACKER = ProcessTracker()
+
+class Forecaster:
+    # Holt smoothing with time-based weights, so irregular sample spacing still decays by half-life
+    def __init__(self, level_halflife=FORECAST_LEVEL_HALFLIFE, trend_halflife=FORECAST_TREND_HALFLIFE):
+        self.level_halflife = level_halflife
+        self.trend_halflife = trend_halflife
+        self.time = None
+        self.level = None
+        self.trend = [0.0, 0.0, 0.0]
+        self.lock = threading.Lock()
+
+    def update(self, sample):
+        t = sample["time"]
+        values = [sample["cpu"], sample["gpu"], sample["memory"]]
+        with self.lock:
+            if self.level is None:
+                self.time, self.level = t, values
+                return
+            dt = t - self.time
+            if dt <= 0:
+                return
+            a = 1 - 0.5 ** (dt / self.level_halflife)
+            b = 1 - 0.5 ** (dt / self.trend_halflife)
+            for c, value in enumerate(values):
+                predicted = self.level[c] + self.trend[c] * dt
+                level = predicted + a * (value - predicted)
+                self.trend[c] += b * ((level - self.level[c]) / dt - self.trend[c])
+                self.level[c] = level
+            self.time = t
+
+    def forecast(self, seconds=FORECAST_HORIZON):
+        with self.lock:
+            if self.level is None:
+                return None
+            return {col: min(100.0, max(0.0, level + trend * seconds)) for col, level, trend in zip(USAGE_COLUMNS, self.level, self.trend)}
+
+    def peak(self, seconds=FORECAST_HORIZON):
+        # the trend is linear, so the highest load over the horizon is at one of its ends
+        now = self.forecast(0)
+        later = self.forecast(seconds)
+        if now is None:
+            return None
+        return {col: max(now[col], later[col]) for col in USAGE_COLUMNS}
+
+FORECAST = Forecaster()
+
+class Sampler:
+    def __init__(self, interval=SAMPLE_INTERVAL, window=SAMPLE_WINDOW, capacity=SAMPLE_CAPACITY, tracker=TRACKER, forecaster=FORECAST):
+        self.tracker = tracker
+        self.forecaster = forecaster
+        self.interval = interval
+        self.window = window
+        self.samples = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.subscribers = set()
+        self.ready = threading.Event()
+        self.thread = None
+        self.pid = None
+
+    def start(self):
+        with self.lock:
+            # gunicorn forks workers after import, so each process starts its own thread
+            if self.thread is not None and self.thread.is_alive() and self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, name="alvya-sampler", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        psutil.cpu_percent(interval=None)
+        while True:
+            sample = read_usage(self.interval)
+            if self.tracker is not None:
+                try:
+                    self.tracker.tick(sample)
+                except Exception:
+                    pass
+            if self.forecaster is not None:
+                self.forecaster.update(sample)
+            with self.changed:
+                self.samples.append(sample)
+                for subscriber in self.subscribers:
+                    subscriber.push(sample)
+                self.changed.notify_all()
+            self.ready.set()
+            if METRICS_ENABLED:
+                METRICS.set("alvya_sampler_lag_seconds", (), max(0.0, time.time() - sample["time"] - self.interval))
+                METRICS.set("alvya_sampler_last_sample_timestamp_seconds", (), sample["time"])
+
+    def subscribe(self, maxlen=STREAM_BUFFER):
+        self.start()
+        subscription = Subscription(self, maxlen)
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def wait(self):
+        self.start()
+        self.ready.wait(self.interval * 2 + 1)
+
+    def recent(self, seconds=None):
+        self.wait()
+        seconds = self.window if seconds is None else seconds
+        recent = []
+        with self.lock:
+            if self.samples:
+                cutoff = self.samples[-1]["time"] - seconds
+                for sample in reversed(self.samples):
+                    if sample["time"] <= cutoff:
+                        break
+                    recent.append(sample)
+        recent.reverse()
+        return recent
+
+    def latest(self):
+        self.wait()
+        with self.lock:
+            return self.samples[-1] if self.samples else None
+
+SAMPLER = Sampler()
+
+@timed("system_usage")
+def system_usage():
+    sample = SAMPLER.latest()
+    if sample is None:
+        sample = read_usage(SAMPLER.interval)
+    return {"cpu": sample["cpu"], "gpu": sample["gpu"], "memory": sample["memory"]}
+
+@timed("check_task")
+def check_task(tid, tasks_df, dur=None, usage_tolerance=10):
     task = tasks_df[tasks_df["tid"] == tid]
     if task.empty:
         return {"error": "Invalid Task"}
-    task = task.iloc[0]
-    usage_data = [system_usage() for _ in range(dur)]
+    dur = SAMPLER.window if dur is None else dur
+    if TRACKER.bound(tid):
+        SAMPLER.wait()
+        usage_data = TRACKER.recent(tid, dur)
+        if usage_data:
+            return dict(summarize_usage(tid, task.iloc[0], usage_data), scope="task")
+    usage_data = SAMPLER.recent(dur) or [system_usage()]
+    return dict(summarize_usage(tid, task.iloc[0], usage_data), scope="system")
+
+def task_expectations(task):
+    learned = PROFILES.expected(int(task["tid"]))
+    if learned is None:
+        return {c: task[c] for c in EXPECTED_COLUMNS}, False
+    return dict(zip(EXPECTED_COLUMNS, np.round(learned, 2).tolist())), True
+
+def summarize_usage(tid, task, usage_data):
     avg_usage = {
         "cpu": sum(d["cpu"] for d in usage_data) / len(usage_data),
         "gpu": sum(d["gpu"] for d in usage_data) / len(usage_data),
         "memory": sum(d["memory"] for d in usage_data) / len(usage_data)
     }
-    return {
+    expected, learned = task_expectations(task)
+    return dict({
         "tid": tid,
         "tname": task["tname"],
         "avg_cpu": round(avg_usage["cpu"], 2),
         "avg_gpu": round(avg_usage["gpu"], 2),
-        "avg_mem": round(avg_usage["memory"], 2),
-        "ecpu": task["ecpu"],
-        "egpu": task["egpu"],
-        "emem": task["emem"]
-    }
+        "avg_mem": round(avg_usage["memory"], 2)
+    }, learned=learned, **expected)
 
-def calculate_rolling_usage(history_df):
-    history_df['time'] = pd.to_datetime(history_df['time'])
-    history_df = history_df.set_index('time')
-    rolling = history_df[['acpu', 'agpu', 'amem']].rolling(window='5Min').mean().dropna()
-    return rolling.reset_index()
+def workload_status(task_result, usage_tolerance=10):
+    # a learned expectation is already the task's p95, so it needs no extra tolerance
+    if task_result.get("learned"):
+        usage_tolerance = 0
+    avg_exceeds_expected = (
+        (task_result["avg_cpu"] > task_result["ecpu"] + usage_tolerance) or
+        (task_result["avg_gpu"] > task_result["egpu"] + usage_tolerance) or
+        (task_result["avg_mem"] > task_result["emem"] + usage_tolerance)
+    )
+    return "High Workload" if avg_exceeds_expected else "Low Workload"
 
-def is_low_work_task(task):
-    return task["ecpu"] <= 30 and task["egpu"] <= 30 and task["emem"] <= 30
+def stream_event(sample, task=None, dropped=0):
+    scope = "system"
+    if task is not None:
+        reading = TRACKER.at(int(task["tid"]), sample)
+        if reading is not None:
+            sample, scope = reading, "task"
+    event = {"time": sample["time"], "cpu": sample["cpu"], "gpu": sample["gpu"], "memory": sample["memory"], "scope": scope, "dropped": dropped}
+    if task is not None:
+        expected, learned = task_expectations(task)
+        event.update({"tid": int(task["tid"]), "tname": task["tname"], "learned": learned})
+        event.update({c: float(v) for c, v in expected.items()})
+        event["status"] = workload_status({
+            "avg_cpu": sample["cpu"], "avg_gpu": sample["gpu"], "avg_mem": sample["memory"],
+            "ecpu": event["ecpu"], "egpu": event["egpu"], "emem": event["emem"], "learned": learned
+        })
+    return event
 
-def suggest_task(rolling_usage, tasks_df):
-    if rolling_usage.empty:
-        return None, None
-    last_usage = rolling_usage.iloc[-1]
-    is_high = last_usage['acpu'] > 70 and last_usage['agpu'] > 70 and last_usage['amem'] > 70
-    is_low = last_usage['acpu'] < 30 and last_usage['agpu'] < 30 and last_usage['amem'] < 30
-    if is_high:
-        low_tasks = tasks_df[tasks_df.apply(is_low_work_task, axis=1)]
-        return low_tasks.iloc[0].to_dict() if not low_tasks.empty else None, "low"
-    elif is_low:
-        high_tasks = tasks_df[~tasks_df.apply(is_low_work_task, axis=1)]
-        return high_tasks.iloc[0].to_dict() if not high_tasks.empty else None, "high"
-    return None, None
+USAGE_COLUMNS = ["acpu", "agpu", "amem"]
 
-# Routes
-@app.route("/")
-def home():
-    html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Alvya - AI Task Management</title>
-        <style>
-            :root { --primary: #4f46e5; --dark-text: #ffffff; --light-bg: #f4f5f7; --light-text: #333; }
-            body { font-family: 'Arial', sans-serif; margin: 0; padding: 0; background: var(--light-bg); color: var(--light-text); transition: all 0.3s ease; }
-            body.dark { background: linear-gradient(135deg, #000000, #4b0082); color: var(--dark-text); }
-            header { display: flex; justify-content: space-between; align-items: center; padding: 20px 40px; background: #fff; box-shadow: 0 4px 10px rgba(0,0,0,0.1); transition: background 0.3s ease; position: relative; }
-            body.dark header { background: #3a2b63; }
-            .logo { font-size: 28px; font-weight: bold; color: var(--dark-text); text-decoration: none; position: absolute; left: 50%; transform: translateX(-50%); transition: transform 0.3s ease; text-shadow: 2px 2px 4px rgba(0,0,0,0.3); }
-            body.dark .logo { color: var(--dark-text); text-shadow: 0 0 15px #fff, 0 0 30px #fff, 0 0 10px #fff; }
-            .logo:hover { transform: translateX(-50%) scale(1.1); }
-            nav { display: flex; align-items: center; }
-            .theme-toggle { font-size: 24px; cursor: pointer; transition: transform 0.3s ease; }
-            body.dark .theme-toggle::before { content: '🌙'; }
-            .theme-toggle:not(.dark)::before { content: '☀'; }
-            .theme-toggle:hover { transform: scale(1.2); }
-            nav ul { list-style: none; display: flex; margin: 0; padding: 0; }
-            nav ul li { margin: 0 20px; }
-            nav ul li a { color: inherit; text-decoration: none; font-weight: bold; font-size: 16px; padding: 8px 16px; border-radius: 5px; transition: background 0.3s ease, transform 0.3s ease; }
-            nav ul li a:hover { background: rgba(79, 70, 229, 0.1); transform: translateY(-2px); }
-            .hero { padding: 80px 20px; margin: 30px auto; width: 85%; background: #fff; border-radius: 15px; box-shadow: 0 6px 20px rgba(0,0,0,0.1); animation: fadeIn 1s ease; transition: background 0.3s ease; position: relative; }
-            body.dark .hero { background: #3a2b63; }
-            .hero h1 { font-size: 42px; margin-bottom: 15px; animation: slideUp 0.8s ease; }
-            .hero p { font-size: 20px; color: #666; margin-bottom: 30px; animation: slideUp 1s ease; }
-            body.dark .hero p { color: #d1d5db; }
-            .btn { background: var(--primary); color: #fff; padding: 12px 25px; border-radius: 8px; font-size: 18px; text-decoration: none; display: inline-block; position: relative; overflow: hidden; transition: transform 0.3s ease, box-shadow 0.3s ease; }
-            .btn:hover { transform: scale(1.05); box-shadow: 0 4px 15px rgba(79, 70, 229, 0.4); }
-            .btn::after { content: '🚀'; position: absolute; top: 90%; left: 50%; transform: translateX(-50%) rotate(45deg); font-size: 24px; opacity: 0; transition: all 1.2s ease; }
-            .btn.clicked::after { top: -10%; opacity: 1; }
-            footer { position: fixed; bottom: 0; width: 100%; padding: 15px; background: #fff; text-align: center; box-shadow: 0 -2px 10px rgba(0,0,0,0.1); transition: background 0.3s ease; }
-            body.dark footer { background: #3a2b63; }
-            .loading { position: fixed; top: 0; left: 0; width: 100%; height: 100%; background: rgba(0,0,0,0.8); display: none; justify-content: center; align-items: center; z-index: 100; }
-            .loading.active { display: flex; }
-            .rocket { font-size: 50px; animation: propel 1.2s ease forwards; position: absolute; text-shadow: 0 0 15px #fff, 0 0 30px #4f46e5; }
-            @keyframes propel { 
-                0% { top: 90%; left: 50%; transform: translateX(-50%) scale(1); opacity: 1; } 
-                50% { transform: translateX(-50%) scale(1.5); opacity: 1; } 
-                100% { top: -10%; left: 90%; transform: translateX(-50%) scale(1); opacity: 0; } 
+def to_ns(t):
+    # floats are epoch seconds as returned by time.time(); integers are epoch nanoseconds like pd.Timestamp
+    if isinstance(t, (float, np.floating)):
+        return int(t * 1_000_000_000)
+    if isinstance(t, (int, np.integer)):
+        return int(t)
+    t = pd.Timestamp(t)
+    if t is pd.NaT:
+        raise ValueError("invalid timestamp")
+    return t.value
+
+class RollingUsage:
+    def __init__(self, window="5Min", capacity=1024):
+        self.window = pd.Timedelta(window).value
+        self.size = 0
+        self.times = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty((capacity, 3), dtype=np.float32)
+        self.means = np.empty((capacity, 3), dtype=np.float64)
+        self.head = 0
+        self.last_valid = -1
+        self.sums = [0.0, 0.0, 0.0]
+        self.counts = [0, 0, 0]
+        self.maxes = [deque(), deque(), deque()]
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, history_df, window="5Min"):
+        rolling = cls(window, capacity=max(len(history_df), 16))
+        rolling.extend(history_df)
+        return rolling
+
+    def reserve(self, n):
+        if n <= len(self.times):
+            return
+        capacity = max(n, len(self.times) * 2)
+        for name in ("times", "values", "means"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def append(self, t, acpu, agpu, amem):
+        t = to_ns(t)
+        with self.lock:
+            i = self.size
+            if i and t < self.times[i - 1]:
+                raise ValueError("history must be appended in time order")
+            self.reserve(i + 1)
+            self.times[i] = t
+            self.values[i] = (acpu, agpu, amem)
+            self.size = i + 1
+            cutoff = t - self.window
+            while self.times[self.head] <= cutoff:
+                for c, v in enumerate(self.values[self.head].tolist()):
+                    if not math.isnan(v):
+                        self.sums[c] -= v
+                        self.counts[c] -= 1
+                self.head += 1
+            for c, v in enumerate(self.values[i].tolist()):
+                if math.isnan(v):
+                    continue
+                self.sums[c] += v
+                self.counts[c] += 1
+                maxes = self.maxes[c]
+                while maxes and self.values[maxes[-1], c] <= v:
+                    maxes.pop()
+                maxes.append(i)
+            for maxes in self.maxes:
+                while maxes and maxes[0] < self.head:
+                    maxes.popleft()
+            self.means[i] = [s / n if n else np.nan for s, n in zip(self.sums, self.counts)]
+            if all(self.counts):
+                self.last_valid = i
+
+    def extend(self, history_df):
+        if history_df.empty:
+            return
+        times = history_df["time"]
+        if not pd.api.types.is_datetime64_dtype(times):
+            times = pd.to_datetime(times)
+        times = times.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        self.extend_arrays(times, history_df[USAGE_COLUMNS].to_numpy(dtype=np.float32))
+
+    def extend_arrays(self, times, values):
+        if not len(times):
+            return
+        with self.lock:
+            first = self.size
+            if np.any(np.diff(times) < 0) or (first and times[0] < self.times[first - 1]):
+                raise ValueError("history must be appended in time order")
+            self.reserve(first + len(times))
+            self.times[first:first + len(times)] = times
+            self.values[first:first + len(times)] = values
+            self.size = first + len(times)
+            starts = np.searchsorted(self.times[:self.size], times - self.window, side="right")
+            base = min(int(starts[0]), self.head)
+            window = self.values[base:self.size].astype(np.float64)
+            valid = ~np.isnan(window)
+            sums = np.zeros((len(window) + 1, 3))
+            counts = np.zeros((len(window) + 1, 3), dtype=np.int64)
+            np.cumsum(np.where(valid, window, 0), axis=0, out=sums[1:])
+            np.cumsum(valid, axis=0, out=counts[1:])
+            ends = np.arange(first, self.size) + 1 - base
+            n = counts[ends] - counts[starts - base]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self.means[first:self.size] = np.where(n > 0, (sums[ends] - sums[starts - base]) / n, np.nan)
+            complete = np.flatnonzero(n.all(axis=1))
+            if len(complete):
+                self.last_valid = first + int(complete[-1])
+            self.head = int(starts[-1])
+            self.rebuild()
+
+    def rebuild(self):
+        window = self.values[self.head:self.size]
+        valid = ~np.isnan(window)
+        self.sums = np.where(valid, window, 0).astype(np.float64).sum(axis=0).tolist()
+        self.counts = valid.sum(axis=0).tolist()
+        self.maxes = [deque(), deque(), deque()]
+        for i in range(self.head, self.size):
+            for c, v in enumerate(self.values[i].tolist()):
+                if math.isnan(v):
+                    continue
+                maxes = self.maxes[c]
+                while maxes and self.values[maxes[-1], c] <= v:
+                    maxes.pop()
+                maxes.append(i)
+
+    def compact(self):
+        # drop rows that can no longer affect the current window
+        with self.lock:
+            keep = self.head if self.last_valid < 0 else min(self.head, self.last_valid)
+            if not keep:
+                return
+            n = self.size - keep
+            for name in ("times", "values", "means"):
+                array = getattr(self, name)
+                array[:n] = array[keep:self.size]
+            self.size = n
+            self.head -= keep
+            if self.last_valid >= 0:
+                self.last_valid -= keep
+            self.maxes = [deque(i - keep for i in maxes) for maxes in self.maxes]
+
+    def current(self):
+        with self.lock:
+            i = self.last_valid
+            if i < 0:
+                return None
+            row = self.means[i].tolist()
+            return {"time": pd.Timestamp(int(self.times[i])), "acpu": row[0], "agpu": row[1], "amem": row[2]}
+
+    def window_max(self):
+        with self.lock:
+            return {col: float(self.values[m[0], c]) if m else None for c, (col, m) in enumerate(zip(USAGE_COLUMNS, self.maxes))}
+
+    def window_percentile(self, q):
+        with self.lock:
+            window = self.values[self.head:self.size]
+            if not len(window):
+                return None
+            return dict(zip(USAGE_COLUMNS, np.nanpercentile(window, q, axis=0).tolist()))
+
+    def frame(self):
+        with self.lock:
+            rolling = pd.DataFrame(self.means[:self.size].copy(), columns=USAGE_COLUMNS)
+            rolling.insert(0, "time", self.times[:self.size].view("datetime64[ns]"))
+        return rolling.dropna().reset_index(drop=True)
+
+HISTORY_RECORD = np.dtype([
+    ("time", "<i8"), ("tid", "<i4"),
+    ("acpu", "<f4"), ("agpu", "<f4"), ("amem", "<f4"), ("dur", "<f4")
+])
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DIR, segment=HISTORY_SEGMENT, retention=HISTORY_RETENTION, fsync=HISTORY_FSYNC, dtype=HISTORY_RECORD, skew=HISTORY_SKEW):
+        self.path = path
+        self.dtype = dtype
+        self.span = segment * 1_000_000_000
+        self.retention = retention * 1_000_000_000
+        self.skew = int(skew * 1_000_000_000)
+        self.fsync = fsync
+        self.maps = {}
+        self.lock = threading.Lock()
+
+    def segment_file(self, start):
+        return os.path.join(self.path, "%020d.seg" % start)
+
+    def segments(self):
+        # sparse time index: each segment file covers [start, start + span)
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-4]) for name in names if name.endswith(".seg"))
+
+    def records(self, start):
+        try:
+            size = os.path.getsize(self.segment_file(start))
+        except FileNotFoundError:
+            return np.empty(0, dtype=self.dtype)
+        # a torn write from a crash leaves a partial record at the tail; readers ignore it
+        count = size // self.dtype.itemsize
+        if not count:
+            return np.empty(0, dtype=self.dtype)
+        with self.lock:
+            mapped = self.maps.get(start)
+            if mapped is None or len(mapped) < count:
+                mapped = np.memmap(self.segment_file(start), dtype=self.dtype, mode="r", shape=(count,))
+                self.maps[start] = mapped
+        return mapped[:count]
+
+    def __len__(self):
+        total = 0
+        for start in self.segments():
+            try:
+                total += os.path.getsize(self.segment_file(start)) // self.dtype.itemsize
+            except FileNotFoundError:
+                pass
+        return total
+
+    def locked(self):
+        os.makedirs(self.path, exist_ok=True)
+        fd = os.open(os.path.join(self.path, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    def append(self, t, tid, acpu, agpu, amem, dur):
+        records = np.zeros(1, dtype=self.dtype)
+        records[0] = (to_ns(t), tid, acpu, agpu, amem, dur)
+        self.extend(records)
+
+    def extend(self, records):
+        if isinstance(records, pd.DataFrame):
+            frame = records
+            records = np.zeros(len(frame), dtype=self.dtype)
+            records["time"] = pd.to_datetime(frame["time"]).to_numpy(dtype="datetime64[ns]").view(np.int64)
+            for name in self.dtype.names[1:]:
+                if name in frame:
+                    records[name] = frame[name].to_numpy()
+        if not len(records):
+            return
+        if int(records["time"].max()) > time.time_ns() + self.skew:
+            raise ValueError("history records dated more than %g seconds ahead of the clock are refused" % (self.skew / 1e9))
+        fd = self.locked()
+        try:
+            segments = self.segments()
+            last = self.last_time(segments)
+            # workers race between taking a timestamp and taking the lock, so records up to skew late are
+            # moved up to keep files time-ordered; anything later than that is refused, never rewritten
+            ordered = np.maximum.accumulate(records["time"])
+            if last is not None:
+                np.maximum(ordered, last, out=ordered)
+            if (ordered - records["time"] > self.skew).any():
+                raise ValueError("history records more than %g seconds older than the newest stored record are refused" % (self.skew / 1e9))
+            records = records.copy()
+            records["time"] = ordered
+            starts = records["time"] // self.span * self.span
+            for chunk in np.split(records, np.flatnonzero(np.diff(starts)) + 1):
+                self.write(int(chunk["time"][0] // self.span * self.span), chunk)
+            if not segments or starts[-1] != segments[-1]:
+                self.prune()
+        finally:
+            os.close(fd)
+
+    def write(self, start, records):
+        fd = os.open(self.segment_file(start), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size % self.dtype.itemsize:
+                os.ftruncate(fd, size - size % self.dtype.itemsize)
+            os.write(fd, records.tobytes())
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def last_time(self, segments=None):
+        for start in reversed(self.segments() if segments is None else segments):
+            records = self.records(start)
+            if len(records):
+                return int(records["time"][-1])
+        return None
+
+    def prune(self, now=None):
+        now = time.time_ns() if now is None else now
+        for start in self.segments()[:-1]:
+            if start + self.span <= now - self.retention:
+                try:
+                    os.remove(self.segment_file(start))
+                except FileNotFoundError:
+                    pass
+                with self.lock:
+                    self.maps.pop(start, None)
+
+    def iter_range(self, start=None, end=None):
+        start = None if start is None else to_ns(start)
+        end = None if end is None else to_ns(end)
+        for seg in self.segments():
+            if end is not None and seg > end:
+                break
+            if start is not None and seg + self.span <= start:
+                continue
+            records = self.records(seg)
+            lo = 0 if start is None else np.searchsorted(records["time"], start, side="left")
+            hi = len(records) if end is None else np.searchsorted(records["time"], end, side="right")
+            if hi > lo:
+                yield records[lo:hi]
+
+    def range(self, start=None, end=None):
+        chunks = list(self.iter_range(start, end))
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=self.dtype)
+
+    def since(self, cursor=None):
+        # cursor is (segment start, records already read from that segment)
+        seg_start, seen = cursor or (-1, 0)
+        chunks = []
+        for seg in self.segments():
+            if seg < seg_start:
+                continue
+            records = self.records(seg)
+            skip = seen if seg == seg_start else 0
+            if len(records) > skip:
+                chunks.append(records[skip:])
+            seg_start, seen = seg, max(len(records), skip)
+        records = np.concatenate(chunks) if chunks else np.empty(0, dtype=self.dtype)
+        return records, (seg_start, seen)
+
+    def seek(self, t):
+        t = to_ns(t)
+        segments = self.segments()
+        for seg in segments:
+            if seg + self.span > t:
+                return seg, int(np.searchsorted(self.records(seg)["time"], t, side="right"))
+        # past every stored record: only records appended from now on are new
+        return (segments[-1], len(self.records(segments[-1]))) if segments else None
+
+def history_frame(records):
+    frame = pd.DataFrame({name: records[name] for name in records.dtype.names})
+    frame["time"] = pd.to_datetime(frame["time"])
+    return frame
+
+def usage_values(records):
+    return np.stack([records[c] for c in USAGE_COLUMNS], axis=1)
+
+HISTORY = HistoryStore()
+# checks measured on the task's own processes, the only rows task profiles learn from
+TASK_HISTORY = HistoryStore(os.path.join(HISTORY_DIR, "tasks"))
+
+@timed("calculate_rolling_usage")
+def calculate_rolling_usage(history, start=None, end=None):
+    if not isinstance(history, HistoryStore):
+        return RollingUsage.from_frame(history).frame()
+    # only the requested range plus one window of warm-up is read from the store
+    rolling = RollingUsage()
+    warmup = None if start is None else to_ns(start) - rolling.window
+    records = history.range(warmup, end)
+    rolling.extend_arrays(records["time"], usage_values(records))
+    frame = rolling.frame()
+    if start is not None:
+        frame = frame[frame["time"] >= pd.Timestamp(to_ns(start))].reset_index(drop=True)
+    return frame
+
+ROLLING = RollingUsage()
+ROLLING_CURSOR = None
+ROLLING_LOCK = threading.Lock()
+
+@timed("sync_rolling")
+def sync_rolling():
+    global ROLLING_CURSOR
+    with ROLLING_LOCK:
+        if ROLLING_CURSOR is None:
+            last = HISTORY.last_time()
+            if last is None:
+                return ROLLING
+            ROLLING_CURSOR = HISTORY.seek(last - ROLLING.window)
+        records, ROLLING_CURSOR = HISTORY.since(ROLLING_CURSOR)
+        if len(records):
+            ROLLING.extend_arrays(records["time"], usage_values(records))
+            if ROLLING.head > 1024 and ROLLING.head > ROLLING.size // 2:
+                ROLLING.compact()
+    return ROLLING
+
+ROLLUP_RECORD = np.dtype([("time", "<i8"), ("count", "<i8")] + [
+    ("%s_%s" % (c, stat), "<f8") for c in USAGE_COLUMNS for stat in ("min", "max", "sum")
+])
+
+def raw_rollup(records):
+    rows = np.zeros(len(records), dtype=ROLLUP_RECORD)
+    rows["time"] = records["time"]
+    rows["count"] = 1
+    for c in USAGE_COLUMNS:
+        for stat in ("min", "max", "sum"):
+            rows["%s_%s" % (c, stat)] = records[c]
+    return rows
+
+def rollup(rows, width):
+    if not len(rows):
+        return np.empty(0, dtype=ROLLUP_RECORD)
+    buckets = rows["time"] // width * width
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    out = np.zeros(len(starts), dtype=ROLLUP_RECORD)
+    out["time"] = buckets[starts]
+    out["count"] = np.add.reduceat(rows["count"], starts)
+    for c in USAGE_COLUMNS:
+        out[c + "_min"] = np.minimum.reduceat(rows[c + "_min"], starts)
+        out[c + "_max"] = np.maximum.reduceat(rows[c + "_max"], starts)
+        out[c + "_sum"] = np.add.reduceat(rows[c + "_sum"], starts)
+    return out
+
+def rollup_frame(rows):
+    frame = pd.DataFrame({"time": pd.to_datetime(rows["time"]), "count": rows["count"]})
+    for c in USAGE_COLUMNS:
+        frame[c + "_min"] = rows[c + "_min"]
+        frame[c + "_max"] = rows[c + "_max"]
+        frame[c + "_mean"] = rows[c + "_sum"] / np.maximum(rows["count"], 1)
+        frame[c + "_sum"] = rows[c + "_sum"]
+    return frame
+
+class Rollups:
+    def __init__(self, history, tiers=ROLLUP_TIERS):
+        self.history = history
+        self.tiers = [
+            (width * 1_000_000_000, HistoryStore(os.path.join(history.path, name), segment=width * 1440, retention=retention, dtype=ROLLUP_RECORD))
+            for name, width, retention in tiers
+        ]
+
+    def source(self, level, start, end):
+        if level == 0:
+            return raw_rollup(self.history.range(start, end))
+        return self.buckets(level - 1, start, end)
+
+    def buckets(self, level, start=None, end=None):
+        # partial buckets at either edge are rebuilt from the tier below, so rows cover exactly [start, end]
+        width, store = self.tiers[level]
+        if start is not None and start % width:
+            edge = start - start % width + width
+            head = rollup(self.source(level, start, edge - 1 if end is None else min(edge - 1, end)), width)
+            if end is not None and end < edge:
+                return head
+            return np.concatenate([head, self.buckets(level, edge, end)])
+        if end is not None and (end + 1) % width:
+            edge = end - end % width
+            body = self.buckets(level, start, edge - 1) if start is None or start < edge else np.empty(0, dtype=ROLLUP_RECORD)
+            return np.concatenate([body, rollup(self.source(level, edge, end), width)])
+        # flushed buckets come from the tier's own files, the still-open tail from the tier below
+        flushed = store.last_time()
+        parts = []
+        tail = start
+        if flushed is not None and (start is None or start <= flushed):
+            parts.append(store.range(start, flushed if end is None else min(end, flushed)))
+            tail = flushed + width
+        if end is None or tail is None or tail <= end:
+            parts.append(rollup(self.source(level, tail, end), width))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=ROLLUP_RECORD)
+
+    def sync(self):
+        path = self.tiers[0][1].path if self.tiers else None
+        if path is None:
+            return
+        os.makedirs(path, exist_ok=True)
+        fd = os.open(os.path.join(path, ".sync"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            latest = self.history.last_time()
+            if latest is None:
+                return
+            # only buckets before the one holding the newest raw sample are complete
+            for level, (width, store) in enumerate(self.tiers):
+                current = latest // width * width
+                flushed = store.last_time()
+                start = None if flushed is None else flushed + width
+                if start is not None and start >= current:
+                    continue
+                store.extend(rollup(self.source(level, start, current - 1), width))
+        finally:
+            os.close(fd)
+
+    def query(self, start=None, end=None, resolution=60):
+        start = None if start is None else to_ns(start)
+        end = None if end is None else to_ns(end)
+        resolution = int(resolution * 1_000_000_000)
+        now = time.time_ns()
+        level = None
+        for i, (width, store) in enumerate(self.tiers):
+            if width > resolution:
+                break
+            if start is None or start >= now - store.retention or level is None:
+                level = i
+        if level is None:
+            rows = raw_rollup(self.history.range(start, end))
+            width = 1
+        else:
+            width = self.tiers[level][0]
+            rows = self.buckets(level, start, end)
+        if resolution > width:
+            rows = rollup(rows, resolution)
+        return rollup_frame(rows)
+
+ROLLUPS = Rollups(HISTORY)
+
+def record_history(task_result, dur):
+    if not task_result or "error" in task_result:
+        return
+    row = (time.time(), task_result["tid"], task_result["avg_cpu"], task_result["avg_gpu"], task_result["avg_mem"], dur)
+    try:
+        HISTORY.append(*row)
+        # system-scope checks measure the whole machine, which says nothing about the task itself
+        if task_result.get("scope") == "task":
+            TASK_HISTORY.append(*row)
+    except ValueError:
+        # the wall clock stepped back further than the store's skew; the check result still stands
+        return
+    ROLLUPS.sync()
+
+class TaskProfiles:
+    # per-task running mean/variance (merged batch-wise with Chan's update) and a fixed-bin histogram per
+    # metric for p95; usage is bounded to 0-100%, so the histogram is a compact, mergeable quantile sketch
+    def __init__(self, history, bins=PROFILE_BINS, min_samples=PROFILE_MIN_SAMPLES, interval=PROFILE_SYNC):
+        self.history = history
+        self.bins = bins
+        self.min_samples = min_samples
+        self.interval = interval
+        self.cursor = None
+        self.synced = None
+        self.stats = {}
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def sync(self, force=False):
+        # only rows appended since the last sync are read; nothing is ever refit over the full history
+        with self.lock:
+            now = time.monotonic()
+            if not force and self.synced is not None and now - self.synced < self.interval:
+                return self.version
+            self.synced = now
+            records, self.cursor = self.history.since(self.cursor)
+            if len(records):
+                self.learn(records)
+                self.version += 1
+            return self.version
+
+    def learn(self, records):
+        values = np.stack([records[c] for c in USAGE_COLUMNS], axis=1).astype(np.float64)
+        keep = ~np.isnan(values).any(axis=1)
+        values = values[keep]
+        if not len(values):
+            return
+        tids, inverse = np.unique(records["tid"][keep], return_inverse=True)
+        groups = len(tids)
+        counts = np.bincount(inverse, minlength=groups)
+        means = np.stack([np.bincount(inverse, values[:, c], groups) for c in range(len(USAGE_COLUMNS))], axis=1) / counts[:, None]
+        m2 = np.stack([np.bincount(inverse, (values[:, c] - means[inverse, c]) ** 2, groups) for c in range(len(USAGE_COLUMNS))], axis=1)
+        cells = np.clip((values[:, :3] * (self.bins / 100)).astype(np.int64), 0, self.bins - 1)
+        hist = np.stack([np.bincount(inverse * self.bins + cells[:, c], minlength=groups * self.bins).reshape(groups, self.bins) for c in range(3)], axis=1)
+        for i, tid in enumerate(tids.tolist()):
+            stats = self.stats.get(tid)
+            if stats is None:
+                self.stats[tid] = {"n": int(counts[i]), "mean": means[i], "m2": m2[i], "hist": hist[i]}
+                continue
+            n = stats["n"] + counts[i]
+            delta = means[i] - stats["mean"]
+            stats["mean"] = stats["mean"] + delta * (counts[i] / n)
+            stats["m2"] = stats["m2"] + m2[i] + delta ** 2 * (stats["n"] * counts[i] / n)
+            stats["hist"] = stats["hist"] + hist[i]
+            stats["n"] = int(n)
+
+    def quantile(self, hist, q):
+        cumulative = np.cumsum(hist)
+        target = q * cumulative[-1]
+        i = int(np.searchsorted(cumulative, target))
+        below = cumulative[i - 1] if i else 0
+        return (i + (target - below) / hist[i]) * (100 / self.bins)
+
+    def profile(self, tid):
+        self.sync()
+        with self.lock:
+            stats = self.stats.get(tid)
+            if stats is None:
+                return None
+            std = np.sqrt(stats["m2"] / max(stats["n"] - 1, 1))
+            return {
+                "samples": stats["n"],
+                "mean": dict(zip(USAGE_COLUMNS, stats["mean"].round(2).tolist())),
+                "std": dict(zip(USAGE_COLUMNS, std.round(2).tolist())),
+                "p95": dict(zip(USAGE_COLUMNS, np.round(self.p95(stats), 2).tolist()))
             }
-            @keyframes fadeIn { from { opacity: 0; } to { opacity: 1; } }
-            @keyframes slideUp { from { opacity: 0; transform: translateY(20px); } to { opacity: 1; transform: translateY(0); } }
-        </style>
+
+    def p95(self, stats):
+        return [self.quantile(stats["hist"][i], 0.95) for i in range(3)]
+
+    def expected(self, tid):
+        # learned p95 usage once a task has enough history, otherwise None and callers use the catalog
+        self.sync()
+        with self.lock:
+            stats = self.stats.get(tid)
+            return self.p95(stats) if stats is not None and stats["n"] >= self.min_samples else None
+
+    def expectations(self):
+        self.sync()
+        with self.lock:
+            return {tid: self.p95(stats) for tid, stats in self.stats.items() if stats["n"] >= self.min_samples}
+
+PROFILES = TaskProfiles(TASK_HISTORY)
+
+def plain(values):
+    return {k: v.item() if isinstance(v, np.generic) else v for k, v in values.items()}
+
+class JobScheduler:
+    def __init__(self, workers=JOB_WORKERS, queue=JOB_QUEUE, ttl=JOB_TTL, path=JOB_DIR):
+        self.workers = workers
+        self.ttl = ttl
+        self.path = path
+        self.slots = threading.BoundedSemaphore(workers + queue)
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+
+    def pool(self):
+        with self.lock:
+            if self.executor is None or self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="alvya-job")
+            return self.executor
+
+    def submit(self, tid, task, dur):
+        if not self.slots.acquire(blocking=False):
+            return None
+        job = {
+            "id": uuid.uuid4().hex, "tid": tid, "tname": task["tname"], "dur": dur,
+            "status": "queued", "created": time.time(), "started": None, "finished": None,
+            "scope": None, "samples": [], "result": None, "error": None
+        }
+        with self.lock:
+            self.jobs[job["id"]] = job
+        self.save(job)
+        self.evict()
+        try:
+            self.pool().submit(self.run, job, task)
+        except Exception:
+            self.slots.release()
+            raise
+        return self.snapshot(job)
+
+    def run(self, job, task):
+        try:
+            started = time.time()
+            # a job measures one scope throughout, so its average never mixes task and system readings
+            scope = "task" if TRACKER.bound(job["tid"]) else "system"
+            self.update(job, status="running", started=started, scope=scope)
+            # dur is wall-clock seconds; a stalled sampler fails the job instead of holding its slot
+            deadline = started + job["dur"]
+            timeout = deadline + SAMPLER.interval * 2 + 1
+            subscription = SAMPLER.subscribe(maxlen=int(job["dur"] / SAMPLER.interval) + 2)
+            # system samples seen by a task-scope job, used only if the task never yields a reading
+            system = []
+            try:
+                while True:
+                    now = time.time()
+                    if now >= deadline and (job["samples"] or system or now >= timeout):
+                        break
+                    samples = subscription.get(max(0.01, (deadline if now < deadline else timeout) - now))
+                    for sample in samples:
+                        if sample["time"] >= deadline and (job["samples"] or system):
+                            continue
+                        if scope == "task":
+                            system.append({k: sample[k] for k in ("time", "cpu", "gpu", "memory")})
+                            sample = TRACKER.at(job["tid"], sample)
+                            if sample is None:
+                                continue
+                        with self.lock:
+                            job["samples"].append({k: sample[k] for k in ("time", "cpu", "gpu", "memory")})
+                    if samples:
+                        self.save(job)
+            finally:
+                subscription.close()
+            if not job["samples"] and system:
+                self.update(job, scope="system", samples=system)
+            if not job["samples"]:
+                raise RuntimeError("No samples arrived within %d seconds" % job["dur"])
+            result = plain(summarize_usage(job["tid"], task, job["samples"]))
+            result["scope"] = job["scope"]
+            result["status"] = workload_status(result)
+            record_history(result, job["dur"])
+            self.update(job, status="done", result=result, finished=time.time())
+        except Exception as error:
+            self.update(job, status="failed", error=str(error), finished=time.time())
+        finally:
+            self.slots.release()
+
+    def update(self, job, **changes):
+        with self.lock:
+            job.update(changes)
+        self.save(job)
+
+    def snapshot(self, job):
+        with self.lock:
+            return dict(job, samples=list(job["samples"]))
+
+    def job_file(self, job_id):
+        return os.path.join(self.path, job_id + ".json")
+
+    def save(self, job):
+        # other workers answer status polls from this file
+        os.makedirs(self.path, exist_ok=True)
+        tmp = self.job_file(job["id"]) + ".%d.tmp" % threading.get_ident()
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(job), f)
+        os.replace(tmp, self.job_file(job["id"]))
+
+    def get(self, job_id):
+        self.evict()
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is not None:
+            return self.snapshot(job)
+        try:
+            with open(self.job_file(job_id)) as f:
+                job = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if job["finished"] is not None:
+            # finished jobs from other workers are cached here until they expire
+            with self.lock:
+                self.jobs.setdefault(job_id, job)
+        return job
+
+    def evict(self):
+        now = time.time()
+        expired = []
+        with self.lock:
+            for job_id, job in list(self.jobs.items()):
+                if job["finished"] is not None and job["finished"] + self.ttl < now:
+                    expired.append(job_id)
+                    del self.jobs[job_id]
+        for job_id in expired:
+            try:
+                os.remove(self.job_file(job_id))
+            except FileNotFoundError:
+                pass
+
+JOBS = JobScheduler()
+
+NODE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+class NodeSeries:
+    def __init__(self, store, capacity=NODE_CAPACITY):
+        self.store = store
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, 3), dtype=np.float32)
+        self.size = 0
+        self.end = 0
+        self.cursor = None
+
+    def sync(self):
+        # other workers may have ingested batches for this node; pick them up from its store
+        if self.cursor is None:
+            last = self.store.last_time()
+            if last is None:
+                return
+            self.cursor = self.store.seek(last - int(NODE_WINDOW * 1_000_000_000))
+        records, self.cursor = self.store.since(self.cursor)
+        capacity = len(self.times)
+        records = records[-capacity:]
+        n = len(records)
+        if not n:
+            return
+        positions = (self.end + np.arange(n)) % capacity
+        self.times[positions] = records["time"]
+        self.values[positions] = usage_values(records)
+        self.end = (self.end + n) % capacity
+        self.size = min(self.size + n, capacity)
+
+    def usage(self, seconds=NODE_WINDOW):
+        if not self.size:
+            return None
+        latest = self.times[(self.end - 1) % len(self.times)]
+        recent = self.times[:self.size] > latest - int(seconds * 1_000_000_000)
+        means = self.values[:self.size][recent].mean(axis=0).tolist()
+        return dict(zip(USAGE_COLUMNS, means), time=pd.Timestamp(int(latest)), samples=int(recent.sum()))
+
+class NodeBuffers:
+    def __init__(self, path=NODE_DIR, shards=NODE_SHARDS):
+        self.path = path
+        self.shards = [({}, threading.Lock()) for _ in range(shards)]
+
+    def shard(self, node):
+        return self.shards[zlib.crc32(node.encode()) % len(self.shards)]
+
+    def node_path(self, node):
+        # node names become directories, so they must not escape NODE_DIR (".." would be the main history)
+        root = os.path.realpath(self.path)
+        path = os.path.realpath(os.path.join(root, node))
+        if not NODE_NAME.match(node) or os.path.dirname(path) != root:
+            raise ValueError("Invalid node name")
+        return path
+
+    def series(self, node):
+        nodes, lock = self.shard(node)
+        series = nodes.get(node)
+        if series is None:
+            store = HistoryStore(self.node_path(node), retention=NODE_RETENTION, skew=NODE_SKEW)
+            series = nodes.setdefault(node, NodeSeries(store))
+        return series, lock
+
+    def ingest(self, node, times, cpu, gpu, memory):
+        try:
+            times, cpu, gpu, memory = (np.asarray(column, dtype=np.float64) for column in (times, cpu, gpu, memory))
+        except (TypeError, ValueError):
+            raise ValueError("Sample values must be numbers")
+        if any(column.ndim != 1 or len(column) != len(times) for column in (cpu, gpu, memory)):
+            raise ValueError("Sample columns must be flat lists of the same length")
+        usage = np.stack([cpu, gpu, memory])
+        if not np.isfinite(times).all() or not np.isfinite(usage).all():
+            raise ValueError("Sample values must be finite")
+        if ((usage < 0) | (usage > 100)).any():
+            raise ValueError("Usage must be between 0 and 100")
+        # times are epoch seconds; anything older than the node's retention or too far ahead is a bad clock
+        now = time.time()
+        if ((times < now - NODE_RETENTION) | (times > now + NODE_SKEW)).any():
+            raise ValueError("Sample times must be epoch seconds within the last %d seconds and at most %g seconds ahead" % (NODE_RETENTION, NODE_SKEW))
+        records = np.zeros(len(times), dtype=HISTORY_RECORD)
+        records["time"] = (times * 1_000_000_000).astype(np.int64)
+        records["acpu"], records["agpu"], records["amem"] = cpu, gpu, memory
+        order = np.argsort(records["time"], kind="stable")
+        series, lock = self.series(node)
+        series.store.extend(records[order])
+        return len(records)
+
+    def names(self):
+        try:
+            return sorted(name for name in os.listdir(self.path) if NODE_NAME.match(name))
+        except FileNotFoundError:
+            return []
+
+    def usage(self, node, seconds=NODE_WINDOW):
+        series, lock = self.series(node)
+        with lock:
+            series.sync()
+            return series.usage(seconds)
+
+NODES = NodeBuffers()
+
+EXPECTED_COLUMNS = ["ecpu", "egpu", "emem"]
+LOW_WORK_LIMIT = 30
+
+def task_fingerprint(tasks_df):
+    # cheap enough to take on every lookup, and unlike identity it changes when the catalog is edited in place
+    crc = 0
+    for column in ["tid"] + EXPECTED_COLUMNS:
+        crc = zlib.crc32(np.ascontiguousarray(tasks_df[column].to_numpy()), crc)
+    return crc
+
+class TaskIndex:
+    def __init__(self, tasks_df):
+        self.tasks = tasks_df
+        self.fingerprint = task_fingerprint(tasks_df)
+        self.catalog = tasks_df[EXPECTED_COLUMNS].to_numpy(dtype=np.float64)
+        self.positions = pd.Index(tasks_df["tid"])
+        self.learned = np.zeros(len(tasks_df), dtype=bool)
+        self.version = None
+        self.prepare(self.catalog)
+        self.records = None
+
+    def prepare(self, expected):
+        self.expected = expected
+        self.norms = (expected ** 2).sum(axis=1)
+        low = (expected <= LOW_WORK_LIMIT).all(axis=1)
+        self.partitions = {"low": np.flatnonzero(low), "high": np.flatnonzero(~low)}
+
+    def learn(self, profiles):
+        # tasks with enough history are ranked and packed by their learned p95 instead of the catalog numbers
+        self.version = profiles.version
+        learned = profiles.expectations()
+        expected = self.catalog.copy()
+        mask = np.zeros(len(expected), dtype=bool)
+        if learned:
+            rows = self.positions.get_indexer(list(learned))
+            known = rows >= 0
+            expected[rows[known]] = np.array(list(learned.values()), dtype=np.float64)[known]
+            mask[rows[known]] = True
+        self.learned = mask
+        self.prepare(expected)
+
+    def matches(self, tasks_df):
+        return tasks_df is self.tasks and task_fingerprint(tasks_df) == self.fingerprint
+
+    def all_records(self):
+        if self.records is None:
+            self.records = self.tasks.to_dict("records")
+        return self.records
+
+    def record(self, i):
+        record = self.all_records()[i]
+        if self.learned[i]:
+            return dict(record, **dict(zip(EXPECTED_COLUMNS, self.expected[i].round(2).tolist())))
+        return record
+
+    def fits(self, usages, kind, chunk=1 << 22):
+        # whether any task of this kind fits in the headroom left by each usage row
+        idx = self.partitions[kind]
+        headroom = 100 - np.asarray(usages, dtype=np.float64).reshape(-1, 3)
+        if not len(idx):
+            return np.zeros(len(headroom), dtype=bool)
+        expected = self.expected[idx]
+        found = []
+        step = max(1, chunk // len(idx))
+        for lo in range(0, len(headroom), step):
+            h = headroom[lo:lo + step]
+            fit = expected[:, 0] <= h[:, 0, None]
+            for c in (1, 2):
+                fit &= expected[:, c] <= h[:, c, None]
+            found.append(fit.any(axis=1))
+        return np.concatenate(found)
+
+    def rank(self, usages, kind, k=1, chunk=1 << 22):
+        # Closest fit to the remaining headroom; tasks that fit in every resource rank first
+        idx = self.partitions[kind]
+        headroom = 100 - np.asarray(usages, dtype=np.float64).reshape(-1, 3)
+        k = min(k, len(idx))
+        if not k:
+            return np.empty((len(headroom), 0), dtype=np.int64)
+        expected, norms = self.expected[idx], self.norms[idx]
+        ranked = []
+        step = max(1, chunk // len(idx))
+        for lo in range(0, len(headroom), step):
+            h = headroom[lo:lo + step]
+            score = h @ (-2 * expected.T)
+            score += norms
+            score += (h ** 2).sum(axis=1)[:, None]
+            overflow = expected[:, 0] > h[:, 0, None]
+            for c in (1, 2):
+                overflow |= expected[:, c] > h[:, c, None]
+            score += overflow * 1e6
+            if k < len(idx):
+                top = np.argpartition(score, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(len(idx)), score.shape)
+            # stable tie-break on catalog order so equal fits keep the old first-match answer
+            order = np.lexsort((top, np.take_along_axis(score, top, axis=1)), axis=1)
+            ranked.append(idx[np.take_along_axis(top, order, axis=1)])
+        return np.concatenate(ranked)
+
+TASK_INDEX = None
+
+def task_index(tasks_df):
+    global TASK_INDEX
+    index = TASK_INDEX
+    if index is None or not index.matches(tasks_df):
+        index = TASK_INDEX = TaskIndex(tasks_df)
+    if index.version != PROFILES.sync():
+        index.learn(PROFILES)
+    return index
+
+def usage_kinds(usages, index):
+    # a heavy task when one fits in the headroom by its (learned) usage, else a light one, else nothing
+    usages = np.asarray(usages, dtype=np.float64).reshape(-1, 3)
+    kinds = np.full(len(usages), None, dtype=object)
+    kinds[index.fits(usages, "low")] = "low"
+    kinds[index.fits(usages, "high")] = "high"
+    return kinds
+
+def suggest_tasks(usages, tasks_df, k=3):
+    if isinstance(usages, pd.DataFrame):
+        usages = usages[USAGE_COLUMNS]
+    usages = np.asarray(usages, dtype=np.float64).reshape(-1, 3)
+    index = task_index(tasks_df)
+    kinds = usage_kinds(usages, index)
+    results = [([], None)] * len(usages)
+    for kind in ("low", "high"):
+        rows = np.flatnonzero(kinds == kind)
+        if not len(rows):
+            continue
+        ranked = index.rank(usages[rows], kind, k)
+        for row, top in zip(rows.tolist(), ranked.tolist()):
+            results[row] = ([index.record(i) for i in top], kind)
+    return results
+
+@timed("suggest_task")
+def suggest_task(rolling_usage, tasks_df, node=None):
+    if node is not None:
+        rolling_usage = NODES.usage(node)
+    if rolling_usage is None or len(rolling_usage) == 0:
+        return None, None
+    last_usage = rolling_usage.iloc[-1] if isinstance(rolling_usage, pd.DataFrame) else rolling_usage
+    suggestions, kind = suggest_tasks([[last_usage[c] for c in USAGE_COLUMNS]], tasks_df, k=1)[0]
+    if kind is None:
+        return None, None
+    return suggestions[0] if suggestions else None, kind
+
+@timed("plan_allocation")
+def plan_allocation(tids, machines, tasks_df):
+    # multi-dimensional best-fit decreasing: biggest tasks first, each onto the machine it leaves least slack on
+    if not all(math.isfinite(v) and 0 <= v <= 100 for usage in machines.values() for v in usage.values()):
+        raise ValueError("Machine usage must be a finite number between 0 and 100")
+    index = task_index(tasks_df)
+    names = list(machines)
+    free = np.array([[100 - machines[name][c] for c in USAGE_COLUMNS] for name in names], dtype=np.float64).reshape(-1, 3)
+    rows = index.positions.get_indexer(tids)
+    known = rows >= 0
+    demand = index.expected[rows[known]]
+    order = np.lexsort((-demand.sum(axis=1), -demand.max(axis=1)))
+    placed = np.full(len(demand), -1)
+    for i in order.tolist():
+        need = demand[i]
+        fits = (free >= need).all(axis=1)
+        if not fits.any():
+            continue
+        slack = np.where(fits, (free - need).sum(axis=1), np.inf)
+        machine = int(slack.argmin())
+        free[machine] -= need
+        placed[i] = machine
+    records = [index.record(r) for r in rows[known].tolist()]
+    placements = [
+        {"tid": r["tid"], "tname": r["tname"], "machine": names[m]}
+        for r, m in zip(records, placed.tolist()) if m >= 0
+    ]
+    return {
+        "placements": placements,
+        "unplaced": [r["tid"] for r, m in zip(records, placed.tolist()) if m < 0],
+        "unknown": [tid for tid, ok in zip(tids, known.tolist()) if not ok],
+        "remaining": {name: dict(zip(["cpu", "gpu", "memory"], free[m].round(2).tolist())) for m, name in enumerate(names)}
+    }
+
+def local_usage():
+    # highest forecast load over the next FORECAST_HORIZON seconds; the rolling history average until the sampler has run
+    forecast = FORECAST.peak()
+    return forecast if forecast is not None else sync_rolling().current()
+
+def machine_usages(names=None):
+    local = local_usage()
+    if local is None:
+        usage = system_usage()
+        local = {"acpu": usage["cpu"], "agpu": usage["gpu"], "amem": usage["memory"]}
+    machines = {"local": {c: local[c] for c in USAGE_COLUMNS}}
+    known = NODES.names()
+    for node in known if names is None else [name for name in names if name in known]:
+        usage = NODES.usage(node)
+        if usage is not None:
+            machines[node] = {c: usage[c] for c in USAGE_COLUMNS}
+    return machines
+
+# Templates
+STYLE_CSS = """\
+:root { --primary: #4f46e5; --dark-text: #ffffff; --light-bg: #f4f5f7; --light-text: #333; }
+body { font-family: 'Arial', sans-serif; margin: 0; padding: 0; background: var(--light-bg); color: var(--light-text); transition: all 0.3s ease; }
+body.dark { background: linear-gradient(135deg, #000000, #4b0082); color: var(--dark-text); }
+header { display: flex; justify-content: space-between; align-items: center; padding: 20px 40px; background: #fff; box-shadow: 0 4px 10px rgba(0,0,0,0.1); transition: background 0.3s ease; position: relative; }
+body.dark header { background: #3a2b63; }
+.logo { font-size: 28px; font-weight: bold; color: var(--dark-text); text-decoration: none; position: absolute; left: 50%; transform: translateX(-50%); transition: transform 0.3s ease; text-shadow: 2px 2px 4px rgba(0,0,0,0.3); }
+body.dark .logo { color: var(--dark-text); text-shadow: 0 0 15px #fff, 0 0 30px #fff, 0 0 10px #fff; }
+.logo:hover { transform: translateX(-50%) scale(1.1); }
+nav { display: flex; align-items: center; }
+.theme-toggle { font-size: 24px; cursor: pointer; transition: transform 0.3s ease; }
+body.dark .theme-toggle::before { content: '🌙'; }
+.theme-toggle:not(.dark)::before { content: '☀'; }
+.theme-toggle:hover { transform: scale(1.2); }
+nav ul { list-style: none; display: flex; margin: 0; padding: 0; }
+nav ul li { margin: 0 20px; }
+nav ul li a { color: inherit; text-decoration: none; font-weight: bold; font-size: 16px; padding: 8px 16px; border-radius: 5px; transition: background 0.3s ease, transform 0.3s ease; }
+nav ul li a:hover { background: rgba(79, 70, 229, 0.1); transform: translateY(-2px); }
+.hero { padding: 80px 20px; margin: 30px auto; width: 85%; background: #fff; border-radius: 15px; box-shadow: 0 6px 20px rgba(0,0,0,0.1); animation: fadeIn 1s ease; transition: background 0.3s ease; position: relative; }
+body.dark .hero { background: #3a2b63; }
+.hero h1 { font-size: 42px; margin-bottom: 15px; animation: slideUp 0.8s ease; }
+.hero p { font-size: 20px; color: #666; margin-bottom: 30px; animation: slideUp 1s ease; }
+body.dark .hero p { color: #d1d5db; }
+.btn { background: var(--primary); color: #fff; padding: 12px 25px; border-radius: 8px; font-size: 18px; text-decoration: none; display: inline-block; position: relative; overflow: hidden; transition: transform 0.3s ease, box-shadow 0.3s ease; }
+.btn:hover { transform: scale(1.05); box-shadow: 0 4px 15px rgba(79, 70, 229, 0.4); }
+.btn::after { content: '🚀'; position: absolute; top: 90%; left: 50%; transform: translateX(-50%) rotate(45deg); font-size: 24px; opacity: 0; transition: all 1.2s ease; }
+.btn.clicked::after { top: -10%; opacity: 1; }
+footer { position: fixed; bottom: 0; width: 100%; padding: 15px; background: #fff; text-align: center; box-shadow: 0 -2px 10px rgba(0,0,0,0.1); transition: background 0.3s ease; }
+body.dark footer { background: #3a2b63; }
+.loading { position: fixed; top: 0; left: 0; width: 100%; height: 100%; background: rgba(0,0,0,0.8); display: none; justify-content: center; align-items: center; z-index: 100; }
+.loading.active { display: flex; }
+.rocket { font-size: 50px; animation: propel 1.2s ease forwards; position: absolute; text-shadow: 0 0 15px #fff, 0 0 30px #4f46e5; }
+@keyframes propel {
+    0% { top: 90%; left: 50%; transform: translateX(-50%) scale(1); opacity: 1; }
+    50% { transform: translateX(-50%) scale(1.5); opacity: 1; }
+    100% { top: -10%; left: 90%; transform: translateX(-50%) scale(1); opacity: 0; }
+}
+@keyframes fadeIn { from { opacity: 0; } to { opacity: 1; } }
+@keyframes slideUp { from { opacity: 0; transform: translateY(20px); } to { opacity: 1; transform: translateY(0); } }
+.content { padding: 50px 20px; margin: 30px auto; width: 85%; background: #fff; border-radius: 15px; box-shadow: 0 6px 20px rgba(0,0,0,0.1); animation: fadeIn 1s ease; transition: background 0.3s ease; }
+body.dark .content { background: #3a2b63; }
+h1 { font-size: 36px; margin-bottom: 20px; animation: slideUp 0.8s ease; }
+form { margin: 20px 0; }
+select, button { padding: 10px; font-size: 16px; border-radius: 8px; border: none; margin: 0 10px; transition: transform 0.3s ease; }
+select { background: #f0f0f0; }
+body.dark select { background: #4b3a7a; color: #fff; }
+button { background: var(--primary); color: #fff; cursor: pointer; }
+button:hover { transform: scale(1.05); }
+.status-high { color: #e11d48; font-weight: bold; }
+.status-low { color: #16a34a; font-weight: bold; }
+.suggest-btn { margin-top: 20px; }
+.result, .suggestion { margin-top: 30px; padding: 20px; background: #f9fafb; border-radius: 10px; animation: slideUp 1s ease; transition: background 0.3s ease; }
+body.dark .result, body.dark .suggestion { background: #4b3a7a; }
+.suggestion { color: var(--primary); }
+"""
+
+HOME_HTML = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Alvya - AI Task Management</title>
+    <link rel="stylesheet" href="/style.css?v={{ style_etag }}">
+    <script>
+        function rocketLaunch(event) {
+            event.preventDefault();
+            document.querySelector('.btn').classList.add('clicked');
+            document.querySelector('.loading').classList.add('active');
+            setTimeout(() => window.location.href = '/monitor', 1200);
+        }
+    </script>
+</head>
+<body>
+    <header>
+        <div class="theme-toggle" onclick="document.body.classList.toggle('dark')"></div>
+        <a href="/" class="logo">Alvya</a>
+        <nav>
+            <ul>
+                <li><a href="/monitor">Monitoring</a></li>
+                <li><a href="/allocate">Task Allocation</a></li>
+            </ul>
+        </nav>
+    </header>
+    <section class="hero">
+        <h1>AI-Powered Task Management</h1>
+        <p>Optimize workflow, automate processes, and enhance productivity with Alvya.</p>
+        <a href="#" class="btn" onclick="rocketLaunch(event)">Get Started →</a>
+    </section>
+    <div class="loading"><span class="rocket">🚀</span></div>
+    <footer>
+        <p>© 2025 Alvya | All Rights Reserved</p>
+    </footer>
+</body>
+</html>
+"""
+
+MONITOR_HTML = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Alvya - Monitoring</title>
+    <link rel="stylesheet" href="/style.css?v={{ style_etag }}">
+</head>
+<body>
+    <header>
+        <div class="theme-toggle" onclick="document.body.classList.toggle('dark')"></div>
+        <a href="/" class="logo">Alvya</a>
+        <nav>
+            <ul>
+                <li><a href="/monitor">Monitoring</a></li>
+                <li><a href="/allocate">Task Allocation</a></li>
+            </ul>
+        </nav>
+    </header>
+    <section class="content">
+        <h1>Task Monitoring</h1>
+        <form method="post">
+            <label for="task">Select Task:</label>
+            <select name="task" id="task">
+                {% for task in tasks %}
+                    <option value="{{ task.tid }}">{{ task.tname }}</option>
+                {% endfor %}
+            </select>
+            <button type="submit">Monitor Task</button>
+        </form>
+        <form id="job-form">
+            <label for="job-task">Observe Task:</label>
+            <select name="task" id="job-task">
+                {% for task in tasks %}
+                    <option value="{{ task.tid }}">{{ task.tname }}</option>
+                {% endfor %}
+            </select>
+            <select name="dur" id="dur">
+                <option value="60">for 1 minute</option>
+                <option value="300">for 5 minutes</option>
+            </select>
+            <button type="submit">Start Monitoring Job</button>
+        </form>
+        <div class="result" id="job" hidden></div>
         <script>
-            function rocketLaunch(event) {
+            document.getElementById('job-form').onsubmit = function (event) {
                 event.preventDefault();
-                document.querySelector('.btn').classList.add('clicked');
-                document.querySelector('.loading').classList.add('active');
-                setTimeout(() => window.location.href = '/monitor', 1200);
-            }
+                var box = document.getElementById('job');
+                box.hidden = false;
+                fetch('/jobs', {method: 'POST', body: new FormData(event.target)}).then(r => r.json()).then(function (job) {
+                    if (job.error) { box.textContent = job.error; return; }
+                    var poll = setInterval(function () {
+                        fetch('/jobs/' + job.id).then(r => r.json()).then(function (job) {
+                            if (job.status === 'done') {
+                                clearInterval(poll);
+                                var r = job.result;
+                                box.innerText = r.tname + '\nCPU Usage: ' + r.avg_cpu + '% (Expected: ' + r.ecpu + '%)\nGPU Usage: ' + r.avg_gpu + '% (Expected: ' + r.egpu + '%)\nMemory Usage: ' + r.avg_mem + '% (Expected: ' + r.emem + '%)\nOverall Status: ' + r.status;
+                            } else if (job.status === 'failed' || job.error) {
+                                clearInterval(poll);
+                                box.textContent = job.error;
+                            } else {
+                                box.textContent = job.tname + ': ' + (job.started ? Math.min(job.dur, Math.floor(Date.now() / 1000 - job.started)) : 0) + ' of ' + job.dur + ' seconds observed';
+                            }
+                        });
+                    }, 1000);
+                });
+            };
         </script>
-    </head>
-    <body>
-        <header>
-            <div class="theme-toggle" onclick="document.body.classList.toggle('dark')"></div>
-            <a href="/" class="logo">Alvya</a>
-            <nav>
-                <ul>
-                    <li><a href="/monitor">Monitoring</a></li>
-                    <li><a href="/allocate">Task Allocation</a></li>
-                </ul>
-            </nav>
-        </header>
-        <section class="hero">
-            <h1>AI-Powered Task Management</h1>
-            <p>Optimize workflow, automate processes, and enhance productivity with Alvya.</p>
-            <a href="#" class="btn" onclick="rocketLaunch(event)">Get Started →</a>
-        </section>
-        <div class="loading"><span class="rocket">🚀</span></div>
-        <footer>
-            <p>© 2025 Alvya | All Rights Reserved</p>
-        </footer>
-    </body>
-    </html>
-    """
-    return render_template_string(html)
+        {% if task_result %}
+            <div class="result">
+                <h2>{{ task_result.tname }}</h2>
+                <p>CPU Usage: {{ task_result.avg_cpu }}% (Expected: {{ task_result.ecpu }}%)</p>
+                <p>GPU Usage: {{ task_result.avg_gpu }}% (Expected: {{ task_result.egpu }}%)</p>
+                <p>Memory Usage: {{ task_result.avg_mem }}% (Expected: {{ task_result.emem }}%)</p>
+                <p>Overall Status: <span class="{% if overall_status == 'High Workload' %}status-high{% else %}status-low{% endif %}">{{ overall_status }}</span></p>
+                {% if task_result.tid is defined %}
+                    <p>Live: <span id="live">waiting for samples…</span></p>
+                    <script>
+                        new EventSource('/stream?task={{ task_result.tid }}').onmessage = function (event) {
+                            var d = JSON.parse(event.data);
+                            document.getElementById('live').textContent = 'CPU ' + d.cpu + '% · GPU ' + d.gpu + '% · Memory ' + d.memory + '% · ' + d.status;
+                        };
+                    </script>
+                {% endif %}
+            </div>
+            <form action="/allocate" method="get" class="suggest-btn">
+                <button type="submit">Give Suggested Task</button>
+            </form>
+        {% endif %}
+    </section>
+    <footer>
+        <p>© 2025 Alvya | All Rights Reserved</p>
+    </footer>
+</body>
+</html>
+"""
+
+ALLOCATE_HTML = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Alvya - Task Allocation</title>
+    <link rel="stylesheet" href="/style.css?v={{ style_etag }}">
+</head>
+<body>
+    <header>
+        <div class="theme-toggle" onclick="document.body.classList.toggle('dark')"></div>
+        <a href="/" class="logo">Alvya</a>
+        <nav>
+            <ul>
+                <li><a href="/monitor">Monitoring</a></li>
+                <li><a href="/allocate">Task Allocation</a></li>
+            </ul>
+        </nav>
+    </header>
+    <section class="content">
+        <h1>Task Allocation</h1>
+        <form method="post">
+            <label for="task">Select Task:</label>
+            <select name="task" id="task">
+                {% for task in tasks %}
+                    <option value="{{ task.tid }}">{{ task.tname }}</option>
+                {% endfor %}
+            </select>
+            {% if nodes %}
+                <label for="node">on</label>
+                <select name="node" id="node">
+                    <option value="">this machine</option>
+                    {% for node in nodes %}
+                        <option value="{{ node }}">{{ node }}</option>
+                    {% endfor %}
+                </select>
+            {% endif %}
+            <button type="submit">Allocate Task</button>
+        </form>
+        <form method="post">
+            <label for="queue">Plan a Batch:</label>
+            <select name="queue" id="queue" multiple>
+                {% for task in tasks %}
+                    <option value="{{ task.tid }}">{{ task.tname }}</option>
+                {% endfor %}
+            </select>
+            <button type="submit">Plan Placement</button>
+        </form>
+        {% if plan %}
+            <div class="result">
+                <h2>Placement Plan</h2>
+                {% for placement in plan.placements %}
+                    <p>{{ placement.tname }} → {{ placement.machine }}</p>
+                {% endfor %}
+                {% if plan.unplaced %}
+                    <p class="status-high">No capacity left for tasks {{ plan.unplaced | join(', ') }}</p>
+                {% endif %}
+                {% for machine, free in plan.remaining.items() %}
+                    <p>{{ machine }} headroom: CPU {{ free.cpu }}%, GPU {{ free.gpu }}%, Memory {{ free.memory }}%</p>
+                {% endfor %}
+            </div>
+        {% endif %}
+        {% if task_result %}
+            <div class="result">
+                <h2>{{ task_result.tname }}</h2>
+                <p>CPU Usage: {{ task_result.avg_cpu }}% (Expected: {{ task_result.ecpu }}%)</p>
+                <p>GPU Usage: {{ task_result.avg_gpu }}% (Expected: {{ task_result.egpu }}%)</p>
+                <p>Memory Usage: {{ task_result.avg_mem }}% (Expected: {{ task_result.emem }}%)</p>
+                <p>Workload: {{ 'High' if overall_status == 'High Workload' else 'Low' }}</p>
+            </div>
+            {% if suggestion %}
+                <div class="suggestion">
+                    <h3>Suggested Next Task ({{ task_type }}):</h3>
+                    <p>{{ suggestion.tname }} (CPU: {{ suggestion.ecpu }}%, GPU: {{ suggestion.egpu }}%, Memory: {{ suggestion.emem }}%)</p>
+                </div>
+            {% endif %}
+        {% endif %}
+    </section>
+    <footer>
+        <p>© 2025 Alvya | All Rights Reserved</p>
+    </footer>
+</body>
+</html>
+"""
+
+STYLE_ETAG = hashlib.sha1(STYLE_CSS.encode()).hexdigest()[:16]
+HOME_TEMPLATE = app.jinja_env.from_string(HOME_HTML)
+MONITOR_TEMPLATE = app.jinja_env.from_string(MONITOR_HTML)
+ALLOCATE_TEMPLATE = app.jinja_env.from_string(ALLOCATE_HTML)
+HOME_PAGE = HOME_TEMPLATE.render(style_etag=STYLE_ETAG)
+HOME_ETAG = hashlib.sha1(HOME_PAGE.encode()).hexdigest()[:16]
+PAGE_CACHE = {}
+
+def cached_response(body, mimetype, etag, max_age):
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
+@timed("render_page")
+def render_page(template, **context):
+    index = task_index(TASKS)
+    return template.render(tasks=index.all_records(), style_etag=STYLE_ETAG, **context)
+
+def blank_page(template):
+    # GET pages only change when the task catalog does
+    index = task_index(TASKS)
+    cached = PAGE_CACHE.get(template)
+    if cached is None or cached[0] is not index:
+        cached = PAGE_CACHE[template] = (index, render_page(template))
+    return cached[1]
+
+# Routes
+if METRICS_ENABLED or PROFILE_ENABLED:
+    @app.before_request
+    def start_request_timer():
+        g.started = time.perf_counter()
+        if PROFILE_ENABLED and request.args.get("profile") == "1":
+            g.profiler = StackSampler(threading.get_ident()).start()
+
+    @app.after_request
+    def observe_request(response):
+        if METRICS_ENABLED and "started" in g:
+            rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            labels = (("method", request.method), ("route", rule), ("status", str(response.status_code)))
+            METRICS.observe("alvya_request_duration_seconds", labels, time.perf_counter() - g.started)
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            # the folded stacks replace the page and load straight into flamegraph tools
+            return Response(profiler.stop(), mimetype="text/plain")
+        return response
+
+@app.route("/")
+def home():
+    return cached_response(HOME_PAGE, "text/html", HOME_ETAG, 0)
+
+@app.route("/style.css")
+def style():
+    return cached_response(STYLE_CSS, "text/css", STYLE_ETAG, 31536000)
 
 @app.route("/monitor", methods=["GET", "POST"])
 def monitor():
@@ -169,201 +2118,223 @@ def monitor():
             tid = int(request.form["task"])
             task_result = check_task(tid, TASKS)
             if task_result and "error" not in task_result:
-                usage_tolerance = 10
-                avg_exceeds_expected = (
-                    (task_result["avg_cpu"] > task_result["ecpu"] + usage_tolerance) or
-                    (task_result["avg_gpu"] > task_result["egpu"] + usage_tolerance) or
-                    (task_result["avg_mem"] > task_result["emem"] + usage_tolerance)
-                )
-                overall_status = "High Workload" if avg_exceeds_expected else "Low Workload"
-    
-    html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Alvya - Monitoring</title>
-        <style>
-            :root { --primary: #4f46e5; --dark-text: #ffffff; --light-bg: #f4f5f7; --light-text: #333; }
-            body { font-family: 'Arial', sans-serif; margin: 0; padding: 0; background: var(--light-bg); color: var(--light-text); transition: all 0.3s ease; }
-            body.dark { background: linear-gradient(135deg, #000000, #4b0082); color: var(--dark-text); }
-            header { display: flex; justify-content: space-between; align-items: center; padding: 20px 40px; background: #fff; box-shadow: 0 4px 10px rgba(0,0,0,0.1); transition: background 0.3s ease; position: relative; }
-            body.dark header { background: #3a2b63; }
-            .logo { font-size: 28px; font-weight: bold; color: var(--dark-text); text-decoration: none; position: absolute; left: 50%; transform: translateX(-50%); transition: transform 0.3s ease; text-shadow: 2px 2px 4px rgba(0,0,0,0.3); }
-            body.dark .logo { color: var(--dark-text); text-shadow: 0 0 15px #fff, 0 0 30px #fff, 0 0 10px #fff; }
-            .logo:hover { transform: translateX(-50%) scale(1.1); }
-            nav { display: flex; align-items: center; }
-            .theme-toggle { font-size: 24px; cursor: pointer; transition: transform 0.3s ease; }
-            body.dark .theme-toggle::before { content: '🌙'; }
-            .theme-toggle:not(.dark)::before { content: '☀'; }
-            .theme-toggle:hover { transform: scale(1.2); }
-            nav ul { list-style: none; display: flex; margin: 0; padding: 0; }
-            nav ul li { margin: 0 20px; }
-            nav ul li a { color: inherit; text-decoration: none; font-weight: bold; font-size: 16px; padding: 8px 16px; border-radius: 5px; transition: background 0.3s ease, transform 0.3s ease; }
-            nav ul li a:hover { background: rgba(79, 70, 229, 0.1); transform: translateY(-2px); }
-            .content { padding: 50px 20px; margin: 30px auto; width: 85%; background: #fff; border-radius: 15px; box-shadow: 0 6px 20px rgba(0,0,0,0.1); animation: fadeIn 1s ease; transition: background 0.3s ease; }
-            body.dark .content { background: #3a2b63; }
-            h1 { font-size: 36px; margin-bottom: 20px; animation: slideUp 0.8s ease; }
-            form { margin: 20px 0; }
-            select, button { padding: 10px; font-size: 16px; border-radius: 8px; border: none; margin: 0 10px; transition: transform 0.3s ease; }
-            select { background: #f0f0f0; }
-            body.dark select { background: #4b3a7a; color: #fff; }
-            button { background: var(--primary); color: #fff; cursor: pointer; }
-            button:hover { transform: scale(1.05); }
-            .result { margin-top: 30px; padding: 20px; background: #f9fafb; border-radius: 10px; animation: slideUp 1s ease; transition: background 0.3s ease; }
-            body.dark .result { background: #4b3a7a; }
-            .status-high { color: #e11d48; font-weight: bold; }
-            .status-low { color: #16a34a; font-weight: bold; }
-            .suggest-btn { margin-top: 20px; }
-            footer { position: fixed; bottom: 0; width: 100%; padding: 15px; background: #fff; text-align: center; box-shadow: 0 -2px 10px rgba(0,0,0,0.1); transition: background 0.3s ease; }
-            body.dark footer { background: #3a2b63; }
-            @keyframes fadeIn { from { opacity: 0; } to { opacity: 1; } }
-            @keyframes slideUp { from { opacity: 0; transform: translateY(20px); } to { opacity: 1; transform: translateY(0); } }
-        </style>
-    </head>
-    <body>
-        <header>
-            <div class="theme-toggle" onclick="document.body.classList.toggle('dark')"></div>
-            <a href="/" class="logo">Alvya</a>
-            <nav>
-                <ul>
-                    <li><a href="/monitor">Monitoring</a></li>
-                    <li><a href="/allocate">Task Allocation</a></li>
-                </ul>
-            </nav>
-        </header>
-        <section class="content">
-            <h1>Task Monitoring</h1>
-            <form method="post">
-                <label for="task">Select Task:</label>
-                <select name="task" id="task">
-                    {% for task in tasks %}
-                        <option value="{{ task.tid }}">{{ task.tname }}</option>
-                    {% endfor %}
-                </select>
-                <button type="submit">Monitor Task</button>
-            </form>
-            {% if task_result %}
-                <div class="result">
-                    <h2>{{ task_result.tname }}</h2>
-                    <p>CPU Usage: {{ task_result.avg_cpu }}% (Expected: {{ task_result.ecpu }}%)</p>
-                    <p>GPU Usage: {{ task_result.avg_gpu }}% (Expected: {{ task_result.egpu }}%)</p>
-                    <p>Memory Usage: {{ task_result.avg_mem }}% (Expected: {{ task_result.emem }}%)</p>
-                    <p>Overall Status: <span class="{% if overall_status == 'High Workload' %}status-high{% else %}status-low{% endif %}">{{ overall_status }}</span></p>
-                </div>
-                <form action="/allocate" method="get" class="suggest-btn">
-                    <button type="submit">Give Suggested Task</button>
-                </form>
-            {% endif %}
-        </section>
-        <footer>
-            <p>© 2025 Alvya | All Rights Reserved</p>
-        </footer>
-    </body>
-    </html>
-    """
-    return render_template_string(html, tasks=TASKS.to_dict("records"), task_result=task_result, overall_status=overall_status)
+                overall_status = workload_status(task_result)
+            record_history(task_result, SAMPLER.window)
+    if task_result is None:
+        return blank_page(MONITOR_TEMPLATE)
+    return render_page(MONITOR_TEMPLATE, task_result=task_result, overall_status=overall_status)
 
 @app.route("/allocate", methods=["GET", "POST"])
 def allocate():
     task_result = None
+    overall_status = None
     suggestion = None
     task_type = None
+    if request.method == "POST" and "queue" in request.form:
+        plan = plan_allocation([int(tid) for tid in request.form.getlist("queue")], machine_usages(), TASKS)
+        return render_page(ALLOCATE_TEMPLATE, nodes=NODES.names(), plan=plan)
     if request.method == "POST":
         tid = int(request.form["task"])
         task_result = check_task(tid, TASKS)
-        rolling_usage = calculate_rolling_usage(HISTORY.copy())
-        suggestion, task_type = suggest_task(rolling_usage, TASKS)
-    
-    html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Alvya - Task Allocation</title>
-        <style>
-            :root { --primary: #4f46e5; --dark-text: #ffffff; --light-bg: #f4f5f7; --light-text: #333; }
-            body { font-family: 'Arial', sans-serif; margin: 0; padding: 0; background: var(--light-bg); color: var(--light-text); transition: all 0.3s ease; }
-            body.dark { background: linear-gradient(135deg, #000000, #4b0082); color: var(--dark-text); }
-            header { display: flex; justify-content: space-between; align-items: center; padding: 20px 40px; background: #fff; box-shadow: 0 4px 10px rgba(0,0,0,0.1); transition: background 0.3s ease; position: relative; }
-            body.dark header { background: #3a2b63; }
-            .logo { font-size: 28px; font-weight: bold; color: var(--dark-text); text-decoration: none; position: absolute; left: 50%; transform: translateX(-50%); transition: transform 0.3s ease; text-shadow: 2px 2px 4px rgba(0,0,0,0.3); }
-            body.dark .logo { color: var(--dark-text); text-shadow: 0 0 15px #fff, 0 0 30px #fff, 0 0 10px #fff; }
-            .logo:hover { transform: translateX(-50%) scale(1.1); }
-            nav { display: flex; align-items: center; }
-            .theme-toggle { font-size: 24px; cursor: pointer; transition: transform 0.3s ease; }
-            body.dark .theme-toggle::before { content: '🌙'; }
-            .theme-toggle:not(.dark)::before { content: '☀'; }
-            .theme-toggle:hover { transform: scale(1.2); }
-            nav ul { list-style: none; display: flex; margin: 0; padding: 0; }
-            nav ul li { margin: 0 20px; }
-            nav ul li a { color: inherit; text-decoration: none; font-weight: bold; font-size: 16px; padding: 8px 16px; border-radius: 5px; transition: background 0.3s ease, transform 0.3s ease; }
-            nav ul li a:hover { background: rgba(79, 70, 229, 0.1); transform: translateY(-2px); }
-            .content { padding: 50px 20px; margin: 30px auto; width: 85%; background: #fff; border-radius: 15px; box-shadow: 0 6px 20px rgba(0,0,0,0.1); animation: fadeIn 1s ease; transition: background 0.3s ease; }
-            body.dark .content { background: #3a2b63; }
-            h1 { font-size: 36px; margin-bottom: 20px; animation: slideUp 0.8s ease; }
-            form { margin: 20px 0; }
-            select, button { padding: 10px; font-size: 16px; border-radius: 8px; border: none; margin: 0 10px; transition: transform 0.3s ease; }
-            select { background: #f0f0f0; }
-            body.dark select { background: #4b3a7a; color: #fff; }
-            button { background: var(--primary); color: #fff; cursor: pointer; }
-            button:hover { transform: scale(1.05); }
-            .result, .suggestion { margin-top: 30px; padding: 20px; background: #f9fafb; border-radius: 10px; animation: slideUp 1s ease; transition: background 0.3s ease; }
-            body.dark .result, body.dark .suggestion { background: #4b3a7a; }
-            .suggestion { color: var(--primary); }
-            footer { position: fixed; bottom: 0; width: 100%; padding: 15px; background: #fff; text-align: center; box-shadow: 0 -2px 10px rgba(0,0,0,0.1); transition: background 0.3s ease; }
-            body.dark footer { background: #3a2b63; }
-            @keyframes fadeIn { from { opacity: 0; } to { opacity: 1; } }
-            @keyframes slideUp { from { opacity: 0; transform: translateY(20px); } to { opacity: 1; transform: translateY(0); } }
-        </style>
-    </head>
-    <body>
-        <header>
-            <div class="theme-toggle" onclick="document.body.classList.toggle('dark')"></div>
-            <a href="/" class="logo">Alvya</a>
-            <nav>
-                <ul>
-                    <li><a href="/monitor">Monitoring</a></li>
-                    <li><a href="/allocate">Task Allocation</a></li>
-                </ul>
-            </nav>
-        </header>
-        <section class="content">
-            <h1>Task Allocation</h1>
-            <form method="post">
-                <label for="task">Select Task:</label>
-                <select name="task" id="task">
-                    {% for task in tasks %}
-                        <option value="{{ task.tid }}">{{ task.tname }}</option>
-                    {% endfor %}
-                </select>
-                <button type="submit">Allocate Task</button>
-            </form>
-            {% if task_result %}
-                <div class="result">
-                    <h2>{{ task_result.tname }}</h2>
-                    <p>CPU Usage: {{ task_result.avg_cpu }}% (Expected: {{ task_result.ecpu }}%)</p>
-                    <p>GPU Usage: {{ task_result.avg_gpu }}% (Expected: {{ task_result.egpu }}%)</p>
-                    <p>Memory Usage: {{ task_result.avg_mem }}% (Expected: {{ task_result.emem }}%)</p>
-                    <p>Workload: {{ 'High' if task_result.avg_cpu > 70 else 'Low' }}</p>
-                </div>
-                {% if suggestion %}
-                    <div class="suggestion">
-                        <h3>Suggested Next Task ({{ task_type }}):</h3>
-                        <p>{{ suggestion.tname }} (CPU: {{ suggestion.ecpu }}%, GPU: {{ suggestion.egpu }}%, Memory: {{ suggestion.emem }}%)</p>
-                    </div>
-                {% endif %}
-            {% endif %}
-        </section>
-        <footer>
-            <p>© 2025 Alvya | All Rights Reserved</p>
-        </footer>
-    </body>
-    </html>
-    """
-    return render_template_string(html, tasks=TASKS.to_dict("records"), task_result=task_result, suggestion=suggestion, task_type=task_type)
+        if "error" not in task_result:
+            overall_status = workload_status(task_result)
+        record_history(task_result, SAMPLER.window)
+        node = request.form.get("node") or None
+        if node is not None and node in NODES.names():
+            suggestion, task_type = suggest_task(None, TASKS, node=node)
+        else:
+            suggestion, task_type = suggest_task(local_usage(), TASKS)
+    if task_result is None and not NODES.names():
+        return blank_page(ALLOCATE_TEMPLATE)
+    return render_page(ALLOCATE_TEMPLATE, nodes=NODES.names(), task_result=task_result, overall_status=overall_status, suggestion=suggestion, task_type=task_type)
+
+@app.route("/api/allocate", methods=["POST"])
+def allocate_api():
+    data = request.get_json(silent=True) or {}
+    try:
+        tids = [int(tid) for tid in data["tasks"]]
+        machines = data.get("machines")
+        if machines is not None:
+            machines = {str(name): {c: float(usage[c]) for c in USAGE_COLUMNS} for name, usage in machines.items()}
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return {"error": "Expected {tasks: [tid, ...], machines: {name: {acpu, agpu, amem}}}"}, 400
+    if machines is None:
+        machines = machine_usages(data.get("nodes"))
+    try:
+        return plan_allocation(tids, machines, TASKS)
+    except ValueError as error:
+        return {"error": str(error)}, 400
+
+@app.route("/stream")
+def stream():
+    task = None
+    if "task" in request.args:
+        matches = TASKS[TASKS["tid"] == request.args.get("task", type=int)]
+        if matches.empty:
+            return {"error": "Invalid Task"}, 404
+        task = matches.iloc[0]
+
+    def events():
+        # subscribing here, not in the view, means a stream that is never read (HEAD, dropped client) holds nothing
+        subscription = SAMPLER.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                samples = subscription.get(STREAM_HEARTBEAT)
+                if not samples:
+                    yield ": keep-alive\n\n"
+                    continue
+                for sample in samples:
+                    yield "data: %s\n\n" % json.dumps(stream_event(sample, task, subscription.dropped))
+        finally:
+            subscription.close()
+
+    return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    data = request.get_json(silent=True) or request.form
+    try:
+        tid = int(data["task"])
+        dur = int(data.get("dur", 2))
+    except (KeyError, TypeError, ValueError):
+        return {"error": "task and dur must be integers"}, 400
+    if not 1 <= dur <= JOB_MAX_DUR:
+        return {"error": "dur must be between 1 and %d" % JOB_MAX_DUR}, 400
+    task = TASKS[TASKS["tid"] == tid]
+    if task.empty:
+        return {"error": "Invalid Task"}, 404
+    job = JOBS.submit(tid, task.iloc[0], dur)
+    if job is None:
+        return {"error": "Job queue is full"}, 503, {"Retry-After": "5"}
+    return job, 202, {"Location": "/jobs/" + job["id"]}
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return {"error": "Unknown or expired job"}, 404
+    return job
+
+@app.route("/tasks/<int:tid>/bind", methods=["POST", "DELETE"])
+def bind_task(tid):
+    if TASKS[TASKS["tid"] == tid].empty:
+        return {"error": "Invalid Task"}, 404
+    if request.method == "DELETE":
+        TRACKER.unbind(tid)
+        return {"tid": tid, "binding": None}
+    data = request.get_json(silent=True) or request.form
+    try:
+        pid = int(data["pid"]) if data.get("pid") not in (None, "") else None
+        tree = str(data.get("tree", "1")).lower() not in ("0", "false", "no")
+        binding = TRACKER.bind(tid, pid=pid, tree=tree, cgroup=data.get("cgroup") or None)
+    except ValueError as error:
+        return {"error": str(error)}, 400
+    return {"tid": tid, "binding": binding}
+
+@app.route("/ingest", methods=["POST"])
+def ingest():
+    body = request.get_data()
+    if request.headers.get("Content-Encoding") == "gzip":
+        try:
+            body = gzip.decompress(body)
+        except (OSError, EOFError):
+            return {"error": "Invalid gzip body"}, 400
+    try:
+        batch = json.loads(body)
+        node = batch["node"]
+        samples = batch["samples"]
+        columns = [samples[c] for c in ("time", "cpu", "gpu", "memory")]
+    except (ValueError, KeyError, TypeError):
+        return {"error": "Expected {node, samples: {time, cpu, gpu, memory}}"}, 400
+    if not isinstance(node, str) or not NODE_NAME.match(node):
+        return {"error": "Invalid node name"}, 400
+    if not all(isinstance(column, list) for column in columns) or len(set(map(len, columns))) != 1:
+        return {"error": "Sample columns must be lists of the same length"}, 400
+    try:
+        accepted = NODES.ingest(node, *columns)
+    except ValueError as error:
+        return {"error": str(error)}, 400
+    return {"node": node, "accepted": accepted}
+
+@app.route("/nodes")
+def nodes():
+    names = NODES.names()
+    usages = {name: NODES.usage(name) for name in names}
+    live = [name for name in names if usages[name] is not None]
+    suggestions = suggest_tasks([[usages[name][c] for c in USAGE_COLUMNS] for name in live], TASKS, k=1) if live else []
+    result = {}
+    for name, (tasks, kind) in zip(live, suggestions):
+        usage = dict(usages[name], time=str(usages[name]["time"]))
+        result[name] = {"usage": usage, "suggestion": plain(tasks[0]) if tasks else None, "task_type": kind}
+    return {"nodes": result}
+
+@app.route("/metrics")
+def metrics():
+    histograms, gauges = METRICS.collect()
+    segments = HISTORY.segments()
+    sizes = []
+    for start in segments:
+        try:
+            sizes.append(os.path.getsize(HISTORY.segment_file(start)))
+        except FileNotFoundError:
+            pass
+    gauges += [
+        ("alvya_history_records", {}, sum(size // HISTORY.dtype.itemsize for size in sizes)),
+        ("alvya_history_bytes", {}, sum(sizes)),
+        ("alvya_history_segments", {}, len(sizes)),
+        ("alvya_metrics_enabled", {}, int(METRICS_ENABLED)),
+    ]
+    return Response(prometheus_text(histograms, gauges), mimetype="text/plain; version=0.0.4")
+
+@app.route("/profiles")
+def profiles():
+    result = {}
+    for tid in TASKS["tid"].tolist():
+        profile = PROFILES.profile(tid)
+        if profile is not None:
+            result[tid] = dict(profile, learned=profile["samples"] >= PROFILES.min_samples)
+    return {"profiles": result}
+
+@app.route("/forecast")
+def forecast():
+    try:
+        seconds = float(request.args.get("minutes", FORECAST_HORIZON / 60)) * 60
+    except ValueError:
+        return {"error": "minutes must be a number"}, 400
+    if not 0 <= seconds < math.inf:
+        return {"error": "minutes must be a non-negative number"}, 400
+    SAMPLER.wait()
+    return {"seconds": seconds, "forecast": FORECAST.forecast(seconds), "peak": FORECAST.peak(seconds)}
+
+@app.route("/export")
+def export():
+    # parsed before the response starts, since a streamed body can no longer turn into a 400
+    try:
+        start, end = (None if request.args.get(k) is None else to_ns(request.args[k]) for k in ("start", "end"))
+    except ValueError:
+        return {"error": "start and end must be timestamps"}, 400
+
+    def rows():
+        yield ",".join(HISTORY_RECORD.names) + "\n"
+        for records in HISTORY.iter_range(start, end):
+            for lo in range(0, len(records), 65536):
+                yield history_frame(records[lo:lo + 65536]).to_csv(index=False, header=False)
+
+    return Response(rows(), mimetype="text/csv", headers={"Content-Disposition": "attachment; filename=alvya_history.csv"})
+
+@app.route("/history")
+def history():
+    try:
+        start, end = (None if request.args.get(k) is None else to_ns(request.args[k]) for k in ("start", "end"))
+        resolution = float(request.args.get("resolution", 60))
+    except ValueError:
+        return {"error": "start and end must be timestamps and resolution a number of seconds"}, 400
+    if not 1e-9 <= resolution < math.inf:
+        return {"error": "resolution must be a positive number of seconds"}, 400
+    frame = ROLLUPS.query(start, end, resolution)
+    frame["time"] = frame["time"].astype(str)
+    return {"rows": frame.to_dict("records")}
 
 if __name__ == "__main__":
     app.run(debug=True, host="127.0.0.1", port=5000)
@@ -0,0 +1,256 @@
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# route benchmarks record history, so keep it away from the real store unless a directory was given
+if "ALVYA_HISTORY_DIR" not in os.environ:
+    os.environ["ALVYA_HISTORY_DIR"] = tempfile.mkdtemp(prefix="alvya-bench-")
+    atexit.register(shutil.rmtree, os.environ["ALVYA_HISTORY_DIR"], ignore_errors=True)
+
+import numpy as np
+import pandas as pd
+
+import alvya
+
+def synthetic_trace(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    start = time.time() - n
+    cpu = np.clip(50 + np.cumsum(rng.normal(0, 3, n)), 0, 100)
+    memory = np.clip(60 + np.cumsum(rng.normal(0, 0.5, n)), 0, 100)
+    return [
+        {"time": start + i, "cpu": round(float(cpu[i]), 1), "gpu": 0, "memory": round(float(memory[i]), 1)}
+        for i in range(n)
+    ]
+
+def record_trace(path, seconds):
+    trace = [alvya.read_usage(1) for _ in range(seconds)]
+    with open(path, "w") as f:
+        json.dump(trace, f)
+    return trace
+
+def load_trace(path):
+    with open(path) as f:
+        return json.load(f)
+
+def replay(trace):
+    # feed the sampler from the trace instead of psutil, so runs are offline and repeatable
+    samples = iter(trace * 1000)
+
+    def read_usage(interval):
+        return dict(next(samples), time=time.time())
+
+    alvya.read_usage = read_usage
+    alvya.SAMPLER.start = lambda: None
+    alvya.SAMPLER.samples.clear()
+    alvya.SAMPLER.samples.extend(trace)
+    for sample in trace:
+        alvya.FORECAST.update(sample)
+    alvya.SAMPLER.ready.set()
+
+def history_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "time": pd.date_range("2025-03-05", periods=n, freq="s"),
+        "tid": rng.integers(1, 5, n),
+        "acpu": rng.random(n, dtype=np.float32) * 100,
+        "agpu": rng.random(n, dtype=np.float32) * 100,
+        "amem": rng.random(n, dtype=np.float32) * 100,
+        "dur": 2
+    })
+
+def task_catalog(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "tid": np.arange(1, n + 1),
+        "tname": ["Task %d" % i for i in range(1, n + 1)],
+        "ecpu": rng.integers(0, 100, n),
+        "egpu": rng.integers(0, 100, n),
+        "emem": rng.integers(0, 100, n)
+    })
+
+def summarize(latencies, wall, peak):
+    ms = np.asarray(latencies) * 1000
+    return {
+        "iterations": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "throughput_per_s": round(len(ms) / wall, 2) if wall else None,
+        "peak_memory_bytes": peak
+    }
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(fn, min_iterations=5, budget=2.0):
+    fn()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < min_iterations or time.perf_counter() - started < budget:
+        t = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t)
+        if len(latencies) >= 100000:
+            break
+    return summarize(latencies, time.perf_counter() - started, peak_memory(fn))
+
+def bench_check_task(args):
+    return {"check_task": measure(lambda: alvya.check_task(1, alvya.TASKS), budget=args.budget)}
+
+def bench_rolling(args):
+    results = {}
+    for exponent in range(2, args.max_history + 1):
+        frame = history_frame(10 ** exponent)
+        results["calculate_rolling_usage/1e%d" % exponent] = measure(
+            lambda: alvya.calculate_rolling_usage(frame), min_iterations=1 if exponent >= 6 else 5, budget=args.budget
+        )
+        rolling = alvya.RollingUsage.from_frame(frame)
+        clock = [frame["time"].iloc[-1].value]
+
+        def append():
+            clock[0] += 1_000_000_000
+            rolling.append(clock[0], 50.0, 50.0, 50.0)
+            rolling.current()
+
+        results["rolling_append/1e%d" % exponent] = measure(append, budget=args.budget)
+    return results
+
+def bench_suggest(args):
+    results = {}
+    usage = {"acpu": 10.0, "agpu": 10.0, "amem": 10.0}
+    for exponent in range(1, args.max_catalog + 1):
+        catalog = task_catalog(10 ** exponent)
+        results["suggest_task/1e%d" % exponent] = measure(lambda: alvya.suggest_task(usage, catalog), budget=args.budget)
+    return results
+
+def bench_routes(args):
+    results = {}
+    requests = [
+        ("GET /monitor", "get", "/monitor", None),
+        ("POST /monitor", "post", "/monitor", {"task": "1"}),
+        ("GET /allocate", "get", "/allocate", None),
+        ("POST /allocate", "post", "/allocate", {"task": "1"}),
+    ]
+    for name, method, path, data in requests:
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(count):
+            client = alvya.app.test_client()
+            mine = []
+            for _ in range(count):
+                t = time.perf_counter()
+                response = getattr(client, method)(path, data=data)
+                mine.append(time.perf_counter() - t)
+                assert response.status_code == 200, response.status_code
+            with lock:
+                latencies.extend(mine)
+
+        getattr(alvya.app.test_client(), method)(path, data=data)
+        per_thread = max(1, args.requests // args.concurrency)
+        threads = [threading.Thread(target=worker, args=(per_thread,)) for _ in range(args.concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        peak = peak_memory(lambda: getattr(alvya.app.test_client(), method)(path, data=data))
+        results["%s/c%d" % (name, args.concurrency)] = summarize(latencies, wall, peak)
+    return results
+
+def bench_metrics(args):
+    # run once with ALVYA_METRICS=1 and once without, then --compare the reports to see what instrumentation costs
+    labels = (("function", "bench"),)
+    results = {"metrics_scrape": measure(lambda: alvya.app.test_client().get("/metrics"), budget=args.budget)}
+    if alvya.METRICS_ENABLED:
+        results["metrics_observe"] = measure(
+            lambda: alvya.METRICS.observe("alvya_function_duration_seconds", labels, 0.001), budget=args.budget
+        )
+    return results
+
+SUITES = {
+    "check_task": bench_check_task,
+    "rolling": bench_rolling,
+    "suggest": bench_suggest,
+    "routes": bench_routes,
+    "metrics": bench_metrics,
+}
+
+def compare(current, baseline, threshold):
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if base[metric] and result[metric] > base[metric] * (1 + threshold):
+                regressions.append({"case": name, "metric": metric, "baseline": base[metric], "current": result[metric]})
+        if base.get("throughput_per_s") and result["throughput_per_s"] < base["throughput_per_s"] / (1 + threshold):
+            regressions.append({"case": name, "metric": "throughput_per_s", "baseline": base["throughput_per_s"], "current": result["throughput_per_s"]})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Alvya's sampling, rolling, suggestion and route hot paths")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="suites to run (default: all)")
+    parser.add_argument("--trace", help="replay psutil readings from this JSON trace instead of a synthetic one")
+    parser.add_argument("--record-trace", metavar="PATH", help="record a trace from the real psutil and exit")
+    parser.add_argument("--trace-seconds", type=int, default=60, help="seconds to record with --record-trace")
+    parser.add_argument("--max-history", type=int, default=6, help="largest history size as a power of ten (up to 7)")
+    parser.add_argument("--max-catalog", type=int, default=5, help="largest task catalog as a power of ten")
+    parser.add_argument("--requests", type=int, default=400, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads per route")
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds spent timing each case")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a stored report")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before a case counts as regressed")
+    args = parser.parse_args(argv)
+
+    if args.record_trace:
+        record_trace(args.record_trace, args.trace_seconds)
+        return 0
+    replay(load_trace(args.trace) if args.trace else synthetic_trace())
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "trace": args.trace or "synthetic",
+            "metrics": alvya.METRICS_ENABLED
+        },
+        "results": {}
+    }
+    for suite in args.suite or list(SUITES):
+        report["results"].update(SUITES[suite](args))
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            report["regressions"] = compare(report, json.load(f), args.threshold)
+        status = 1 if report["regressions"] else 0
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# alvya opens its stores at import, so point them at a scratch directory first
+HISTORY_DIR = tempfile.mkdtemp(prefix="alvya-test-")
+os.environ["ALVYA_HISTORY_DIR"] = HISTORY_DIR
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def pytest_unconfigure(config):
+    shutil.rmtree(HISTORY_DIR, ignore_errors=True)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import alvya
+
+def catalog(rng, n):
+    # tids far from any task the other tests teach profiles about, so the catalog numbers are used
+    return pd.DataFrame({
+        "tid": np.arange(n) + 100000,
+        "tname": ["task %d" % i for i in range(n)],
+        "ecpu": rng.integers(0, 60, n),
+        "egpu": rng.integers(0, 60, n),
+        "emem": rng.integers(0, 60, n)
+    })
+
+def best_fit_decreasing(demand, free):
+    # largest dimension first, then largest total; each task goes where it leaves the least total slack
+    order = sorted(range(len(demand)), key=lambda i: (-max(demand[i]), -sum(demand[i])))
+    free = [list(f) for f in free]
+    placed = [None] * len(demand)
+    for i in order:
+        best = None
+        for m, room in enumerate(free):
+            if all(r >= d for r, d in zip(room, demand[i])):
+                slack = sum(r - d for r, d in zip(room, demand[i]))
+                if best is None or slack < best[0]:
+                    best = (slack, m)
+        if best is not None:
+            placed[i] = best[1]
+            free[best[1]] = [r - d for r, d in zip(free[best[1]], demand[i])]
+    return placed, free
+
+@pytest.mark.parametrize("seed", range(5))
+def test_packing(seed):
+    rng = np.random.default_rng(seed)
+    tasks = catalog(rng, 40)
+    tids = rng.choice(tasks["tid"], 30).tolist()
+    machines = {"m%d" % i: dict(zip(alvya.USAGE_COLUMNS, rng.integers(0, 80, 3).astype(float).tolist())) for i in range(6)}
+    plan = alvya.plan_allocation(tids, machines, tasks)
+    expected = tasks.set_index("tid")[alvya.EXPECTED_COLUMNS]
+    demand = [expected.loc[tid].tolist() for tid in tids]
+    used = {name: np.array([usage[c] for c in alvya.USAGE_COLUMNS]) for name, usage in machines.items()}
+    for placement in plan["placements"]:
+        used[placement["machine"]] += expected.loc[placement["tid"]].to_numpy()
+    assert all((load <= 100).all() for load in used.values())
+    names = list(machines)
+    placed, free = best_fit_decreasing(demand, [[100 - machines[name][c] for c in alvya.USAGE_COLUMNS] for name in names])
+    assert [p["machine"] for p in plan["placements"]] == [names[m] for m in placed if m is not None]
+    assert plan["unplaced"] == [tid for tid, m in zip(tids, placed) if m is None]
+    for m, name in enumerate(names):
+        assert list(plan["remaining"][name].values()) == pytest.approx(free[m])
+
+def test_unknown_tasks():
+    plan = alvya.plan_allocation([1, 999999], {"a": {"acpu": 0.0, "agpu": 0.0, "amem": 0.0}}, alvya.TASKS)
+    assert plan["unknown"] == [999999]
+    assert [p["tid"] for p in plan["placements"]] == [1]
+
+@pytest.mark.parametrize("usage", [-1, 101, "NaN", "Infinity"])
+def test_api_rejects_bad_usage(usage):
+    client = alvya.app.test_client()
+    body = '{"tasks": [1], "machines": {"a": {"acpu": %s, "agpu": 0, "amem": 0}}}' % usage
+    response = client.post("/api/allocate", data=body, content_type="application/json")
+    assert response.status_code == 400
+
+def test_api_plans():
+    client = alvya.app.test_client()
+    response = client.post("/api/allocate", json={"tasks": [2, 4], "machines": {"a": {"acpu": 10, "agpu": 0, "amem": 20}}})
+    assert response.status_code == 200
+    assert [p["machine"] for p in response.get_json()["placements"]] == ["a", "a"]
+
+def test_catalog_edits_in_place_are_seen():
+    tasks = catalog(np.random.default_rng(0), 5)
+    machines = {"a": {"acpu": 50.0, "agpu": 0.0, "amem": 0.0}}
+    tasks.loc[0, alvya.EXPECTED_COLUMNS] = [40, 0, 0]
+    assert alvya.plan_allocation([100000], machines, tasks)["unplaced"] == []
+    tasks.loc[0, "ecpu"] = 60
+    assert alvya.plan_allocation([100000], machines, tasks)["unplaced"] == [100000]
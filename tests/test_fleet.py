@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+import agent
+import alvya
+
+@pytest.fixture
+def client():
+    return alvya.app.test_client()
+
+def node_agent(client, node, batch=60):
+    return agent.Agent(node, agent.client_sender(client), batch=batch)
+
+def buffer(node_agent, times, cpu=40.0, gpu=10.0, memory=60.0):
+    for t in times:
+        node_agent.buffer.append((t, cpu, gpu, memory))
+
+def test_agent_uploads_to_nodes(client):
+    uploader = node_agent(client, "alpha", batch=10)
+    now = time.time()
+    buffer(uploader, [now - 35 + i for i in range(35)])
+    assert uploader.flush() == 35
+    assert not uploader.buffer
+    node = client.get("/nodes").get_json()["nodes"]["alpha"]
+    assert node["usage"]["samples"] == 35
+    assert node["usage"]["acpu"] == pytest.approx(40)
+    assert node["usage"]["agpu"] == pytest.approx(10)
+    assert node["usage"]["amem"] == pytest.approx(60)
+    assert "suggestion" in node
+
+def test_rejected_batch_is_dropped(client):
+    uploader = node_agent(client, "bravo", batch=5)
+    now = time.time()
+    buffer(uploader, [now - 20 + i for i in range(5)], cpu=150.0)
+    buffer(uploader, [now - 10 + i for i in range(5)])
+    assert uploader.flush() == 5
+    assert uploader.dropped == 5
+    assert client.get("/nodes").get_json()["nodes"]["bravo"]["usage"]["samples"] == 5
+
+def test_invalid_node_is_rejected(client):
+    uploader = node_agent(client, "../escape")
+    buffer(uploader, [time.time()])
+    assert uploader.flush() == 0
+    assert uploader.dropped == 1
+    assert "../escape" not in client.get("/nodes").get_json()["nodes"]
+
+def test_server_error_keeps_samples():
+    def send(body):
+        raise RuntimeError("server down")
+    uploader = agent.Agent("charlie", send, batch=2)
+    now = time.time()
+    buffer(uploader, [now - 2, now - 1, now])
+    with pytest.raises(RuntimeError):
+        uploader.flush()
+    assert [sample[0] for sample in uploader.buffer] == [now - 2, now - 1, now]
+
+def test_future_samples(client):
+    uploader = node_agent(client, "delta")
+    now = time.time()
+    buffer(uploader, [now + 120])
+    assert uploader.flush() == 1
+    buffer(uploader, [now + alvya.NODE_SKEW + 60])
+    assert uploader.flush() == 0
+    assert uploader.dropped == 1
+
+def test_late_samples(client):
+    uploader = node_agent(client, "echo")
+    now = time.time()
+    buffer(uploader, [now])
+    assert uploader.flush() == 1
+    # late by less than the node skew: stored at the newest time
+    buffer(uploader, [now - 60])
+    assert uploader.flush() == 1
+    buffer(uploader, [now - alvya.NODE_SKEW - 30])
+    assert uploader.flush() == 0
+    assert uploader.dropped == 1
+    assert client.get("/nodes").get_json()["nodes"]["echo"]["usage"]["samples"] == 2
+
+def test_ingest_rejects_bad_values(client):
+    uploader = node_agent(client, "foxtrot")
+    now = time.time()
+    buffer(uploader, [now], cpu=float("nan"))
+    buffer(uploader, [now - alvya.NODE_RETENTION - 60])
+    uploader.batch = 1
+    assert uploader.flush() == 0
+    assert uploader.dropped == 2
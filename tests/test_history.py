@@ -0,0 +1,150 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import alvya
+
+SECOND = 1_000_000_000
+
+def base():
+    # an hour back, on a minute boundary, so a few minutes of records stay in the past
+    return (time.time_ns() - 3600 * SECOND) // (60 * SECOND) * (60 * SECOND)
+
+def store(tmp_path, **kwargs):
+    kwargs.setdefault("segment", 60)
+    return alvya.HistoryStore(str(tmp_path), **kwargs)
+
+def fill(history, start, n, step=SECOND):
+    times = start + np.arange(n) * step
+    for i, t in enumerate(times):
+        history.append(int(t), i % 4, i % 100, 0, 50, 2)
+    return times
+
+def test_torn_tail_is_ignored_and_truncated(tmp_path):
+    history = store(tmp_path)
+    times = fill(history, base(), 3)
+    path = history.segment_file(history.segments()[-1])
+    with open(path, "ab") as f:
+        f.write(b"\x01" * 10)
+    assert len(history.records(history.segments()[-1])) == 3
+    history.append(int(times[-1]) + SECOND, 7, 1, 2, 3, 2)
+    assert os.path.getsize(path) == 4 * alvya.HISTORY_RECORD.itemsize
+    records = history.range()
+    assert records["time"].tolist() == times.tolist() + [int(times[-1]) + SECOND]
+    assert records[-1]["tid"] == 7
+
+def test_late_records_within_skew_are_moved_up(tmp_path):
+    history = store(tmp_path, skew=60)
+    t = base()
+    history.append(t, 1, 10, 10, 10, 2)
+    history.append(t - 30 * SECOND, 2, 20, 20, 20, 2)
+    records = history.range()
+    assert records["time"].tolist() == [t, t]
+    assert records["tid"].tolist() == [1, 2]
+
+def test_late_records_beyond_skew_are_refused(tmp_path):
+    history = store(tmp_path, skew=60)
+    t = base()
+    history.append(t, 1, 10, 10, 10, 2)
+    with pytest.raises(ValueError, match="older than the newest"):
+        history.append(t - 61 * SECOND, 2, 20, 20, 20, 2)
+    # a batch is refused whole
+    batch = np.zeros(2, dtype=alvya.HISTORY_RECORD)
+    batch["time"] = [t + SECOND, t - 120 * SECOND]
+    with pytest.raises(ValueError):
+        history.extend(batch)
+    assert len(history) == 1
+
+def test_future_records(tmp_path):
+    history = store(tmp_path, skew=60)
+    history.append(time.time() + 30, 1, 10, 10, 10, 2)
+    with pytest.raises(ValueError, match="ahead of the clock"):
+        history.append(time.time() + 120, 1, 10, 10, 10, 2)
+    assert len(history) == 1
+
+def test_extend_dataframe(tmp_path):
+    history = store(tmp_path)
+    t = base()
+    frame = pd.DataFrame({"time": pd.to_datetime([t, t + SECOND]), "tid": [1, 2], "acpu": [5.0, 6.0], "agpu": [0.0, 1.0], "amem": [7.0, 8.0]})
+    history.extend(frame)
+    records = history.range()
+    assert records["time"].tolist() == [t, t + SECOND]
+    assert records["acpu"].tolist() == [5.0, 6.0]
+    assert records["dur"].tolist() == [0.0, 0.0]
+
+def test_range(tmp_path):
+    history = store(tmp_path)
+    times = fill(history, base(), 300)
+    assert len(history.segments()) == 5
+    assert history.range()["time"].tolist() == times.tolist()
+    for lo, hi in [(0, 299), (10, 10), (59, 61), (100, 250)]:
+        records = history.range(int(times[lo]), int(times[hi]))
+        assert records["time"].tolist() == times[lo:hi + 1].tolist()
+    assert not len(history.range(int(times[-1]) + SECOND, None))
+    assert history.range(None, int(times[0]))["time"].tolist() == [times[0]]
+    # the same bounds given as timestamps
+    records = history.range(pd.Timestamp(int(times[60])), str(pd.Timestamp(int(times[120]))))
+    assert records["time"].tolist() == times[60:121].tolist()
+
+def test_since_reads_every_record_once(tmp_path):
+    history = store(tmp_path)
+    records, cursor = history.since()
+    assert not len(records)
+    seen = []
+    t = base()
+    for chunk in range(6):
+        fill(history, t + chunk * 50 * SECOND, 50)
+        records, cursor = history.since(cursor)
+        seen.extend(records["time"].tolist())
+    records, cursor = history.since(cursor)
+    assert not len(records)
+    assert seen == history.range()["time"].tolist()
+    assert len(seen) == 300
+
+def test_seek(tmp_path):
+    history = store(tmp_path)
+    assert history.seek(base()) is None
+    times = fill(history, base(), 300)
+    for i in (0, 59, 60, 150, 299):
+        records, _ = history.since(history.seek(int(times[i])))
+        assert records["time"].tolist() == times[i + 1:].tolist()
+    records, _ = history.since(history.seek(int(times[0]) - SECOND))
+    assert len(records) == 300
+    # past the last record only later appends are returned, even in a new segment
+    cursor = history.seek(int(times[-1]) + 3600 * SECOND)
+    records, cursor = history.since(cursor)
+    assert not len(records)
+    history.append(int(times[-1]) + 120 * SECOND, 1, 1, 1, 1, 2)
+    records, _ = history.since(cursor)
+    assert records["time"].tolist() == [int(times[-1]) + 120 * SECOND]
+
+def test_prune(tmp_path):
+    history = store(tmp_path, retention=7200)
+    times = fill(history, base(), 300)
+    segments = history.segments()
+    # segments that ended at least a retention ago go; the one still overlapping it stays
+    history.prune(now=segments[2] + 7200 * SECOND)
+    assert history.segments() == segments[2:]
+    assert history.range()["time"].tolist() == times[120:].tolist()
+    # the newest segment is always kept
+    history.prune(now=time.time_ns() + 10 ** 6 * SECOND)
+    assert history.segments() == segments[-1:]
+
+def test_prune_on_new_segment(tmp_path):
+    history = store(tmp_path, retention=600)
+    # records far older than the retention are dropped once a new segment starts
+    fill(history, base(), 120)
+    history.append(time.time(), 1, 1, 1, 1, 2)
+    assert len(history.segments()) == 1
+    assert len(history) == 1
+
+def test_export_rejects_bad_bounds():
+    client = alvya.app.test_client()
+    assert client.get("/export?start=garbage").status_code == 400
+    assert client.get("/export?end=2024-13-45").status_code == 400
+    response = client.get("/export?start=2024-01-01")
+    assert response.status_code == 200
+    assert response.data.decode().splitlines()[0] == ",".join(alvya.HISTORY_RECORD.names)
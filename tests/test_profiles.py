@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+import alvya
+
+COLUMNS = ["acpu", "agpu", "amem"]
+
+def store(tmp_path, seed, tids=(1, 2, 3), n=600):
+    rng = np.random.default_rng(seed)
+    history = alvya.HistoryStore(str(tmp_path))
+    rows = np.column_stack([rng.choice(tids, n), rng.random((n, 3)) * 100])
+    start = 1741168800.0
+    for i, (tid, acpu, agpu, amem) in enumerate(rows):
+        history.append(start + i, int(tid), acpu, agpu, amem, 2)
+    return history, rows
+
+@pytest.mark.parametrize("seed", range(3))
+def test_profile_matches_numpy(tmp_path, seed):
+    history, rows = store(tmp_path, seed)
+    profiles = alvya.TaskProfiles(history, interval=0)
+    for tid in (1, 2, 3):
+        values = rows[rows[:, 0] == tid, 1:].astype(np.float32).astype(np.float64)
+        profile = profiles.profile(tid)
+        assert profile["samples"] == len(values)
+        for c, col in enumerate(COLUMNS):
+            assert profile["mean"][col] == pytest.approx(values[:, c].mean(), abs=0.01)
+            assert profile["std"][col] == pytest.approx(values[:, c].std(ddof=1), abs=0.01)
+            # the histogram puts p95 within one bin of the samples around the exact quantile
+            width = 100 / profiles.bins + 0.01
+            assert np.percentile(values[:, c], 95, method="lower") - width <= profile["p95"][col]
+            assert profile["p95"][col] <= np.percentile(values[:, c], 95, method="higher") + width
+        assert "dur" not in profile["mean"]
+
+def test_incremental_matches_bulk(tmp_path):
+    history, rows = store(tmp_path / "bulk", 7)
+    bulk = alvya.TaskProfiles(history, interval=0)
+    bulk.sync()
+    incremental_store = alvya.HistoryStore(str(tmp_path / "incremental"))
+    incremental = alvya.TaskProfiles(incremental_store, interval=0)
+    for i, (tid, acpu, agpu, amem) in enumerate(rows):
+        incremental_store.append(1741168800.0 + i, int(tid), acpu, agpu, amem, 2)
+        if i % 97 == 0:
+            incremental.sync()
+    incremental.sync()
+    for tid in (1, 2, 3):
+        a, b = bulk.stats[tid], incremental.stats[tid]
+        assert a["n"] == b["n"]
+        np.testing.assert_allclose(a["mean"], b["mean"])
+        np.testing.assert_allclose(a["m2"], b["m2"], rtol=1e-9)
+        np.testing.assert_array_equal(a["hist"], b["hist"])
+
+def test_expected_needs_min_samples(tmp_path):
+    history = alvya.HistoryStore(str(tmp_path))
+    profiles = alvya.TaskProfiles(history, min_samples=5, interval=0)
+    for i in range(4):
+        history.append(1741168800.0 + i, 9, 80, 10, 40, 2)
+    assert profiles.expected(9) is None
+    assert 9 not in profiles.expectations()
+    history.append(1741168804.0, 9, 80, 10, 40, 2)
+    assert profiles.expected(9) == pytest.approx([80, 10, 40], abs=100 / profiles.bins)
+
+def test_only_task_scope_is_learned():
+    tid = 4242
+    result = {"tid": tid, "avg_cpu": 1.0, "avg_gpu": 1.0, "avg_mem": 1.0}
+    for _ in range(10):
+        alvya.record_history(dict(result, scope="system"), 2)
+    alvya.PROFILES.sync(force=True)
+    assert alvya.PROFILES.profile(tid) is None
+    for _ in range(alvya.PROFILES.min_samples):
+        alvya.record_history(dict(result, avg_cpu=90.0, scope="task"), 2)
+    alvya.PROFILES.sync(force=True)
+    profile = alvya.PROFILES.profile(tid)
+    assert profile["samples"] == alvya.PROFILES.min_samples
+    assert profile["mean"]["acpu"] == 90.0
+
+def feed(forecaster, values, start=0.0, step=1.0):
+    for i, (cpu, gpu, memory) in enumerate(values):
+        forecaster.update({"time": start + i * step, "cpu": cpu, "gpu": gpu, "memory": memory})
+
+def test_forecast_empty():
+    forecaster = alvya.Forecaster()
+    assert forecaster.forecast() is None
+    assert forecaster.peak() is None
+
+def test_forecast_constant():
+    forecaster = alvya.Forecaster()
+    feed(forecaster, [(40, 10, 60)] * 300)
+    forecast = forecaster.forecast(600)
+    assert forecast["acpu"] == pytest.approx(40)
+    assert forecast["agpu"] == pytest.approx(10)
+    assert forecast["amem"] == pytest.approx(60)
+
+def test_forecast_follows_ramp():
+    forecaster = alvya.Forecaster()
+    # cpu climbs 0.05%/s, memory falls 0.05%/s
+    feed(forecaster, [(10 + 0.05 * i, 20, 60 - 0.05 * i) for i in range(600)])
+    forecast = forecaster.forecast(100)
+    assert forecast["acpu"] == pytest.approx(10 + 0.05 * 699, abs=1)
+    assert forecast["agpu"] == pytest.approx(20)
+    assert forecast["amem"] == pytest.approx(60 - 0.05 * 699, abs=1)
+    peak = forecaster.peak(100)
+    assert peak["acpu"] == pytest.approx(forecast["acpu"])
+    assert peak["amem"] == pytest.approx(forecaster.forecast(0)["amem"])
+
+def test_forecast_clipped():
+    forecaster = alvya.Forecaster()
+    feed(forecaster, [(50 + i, 50 - i, 50) for i in range(40)])
+    forecast = forecaster.forecast(3600)
+    assert forecast["acpu"] == 100.0
+    assert forecast["agpu"] == 0.0
+
+def test_forecast_ignores_stale_samples():
+    forecaster = alvya.Forecaster()
+    feed(forecaster, [(30, 30, 30)] * 10)
+    forecaster.update({"time": 5.0, "cpu": 100, "gpu": 100, "memory": 100})
+    assert forecaster.forecast(0)["acpu"] == pytest.approx(30)
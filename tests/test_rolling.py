@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import alvya
+
+COLUMNS = ["acpu", "agpu", "amem"]
+
+def pandas_rolling(history_df):
+    # the implementation calculate_rolling_usage replaced
+    history_df = history_df.copy()
+    history_df["time"] = pd.to_datetime(history_df["time"])
+    history_df = history_df.set_index("time")
+    return history_df[COLUMNS].rolling(window="5Min").mean().dropna().reset_index()
+
+def history(seed, n=2000, nans=False, strings=False):
+    rng = np.random.default_rng(seed)
+    # whole seconds over a few hours, so many rows share a timestamp
+    seconds = np.sort(rng.integers(0, 4 * 3600, n))
+    times = pd.to_datetime(1741168800 + seconds, unit="s")
+    frame = pd.DataFrame({
+        "time": times.strftime("%Y-%m-%d %H:%M:%S") if strings else times,
+        "tid": rng.integers(1, 5, n),
+        "acpu": rng.integers(0, 100, n).astype(float),
+        "agpu": rng.random(n) * 100,
+        "amem": rng.integers(0, 100, n).astype(float)
+    })
+    if nans:
+        frame.loc[rng.random(n) < 0.1, "agpu"] = np.nan
+        frame.loc[rng.random(n) < 0.02, "acpu"] = np.nan
+    return frame
+
+def assert_same(expected, actual):
+    assert len(expected) == len(actual)
+    assert (pd.to_datetime(expected["time"]).to_numpy() == pd.to_datetime(actual["time"]).to_numpy()).all()
+    # values are kept as float32, so compare at that precision
+    np.testing.assert_allclose(actual[COLUMNS].to_numpy(), expected[COLUMNS].to_numpy(), rtol=1e-5, atol=1e-4)
+
+CASES = [
+    pytest.param({}, id="plain"),
+    pytest.param({"nans": True}, id="nans"),
+    pytest.param({"strings": True}, id="strings"),
+    pytest.param({"nans": True, "strings": True}, id="nans-strings"),
+]
+
+@pytest.mark.parametrize("options", CASES)
+@pytest.mark.parametrize("seed", range(3))
+def test_calculate_rolling_usage_matches_pandas(seed, options):
+    frame = history(seed, **options)
+    assert frame["time"].duplicated().any()
+    assert_same(pandas_rolling(frame), alvya.calculate_rolling_usage(frame))
+
+def test_calculate_rolling_usage_does_not_modify_input():
+    frame = history(0, strings=True)
+    before = frame.copy()
+    alvya.calculate_rolling_usage(frame)
+    pd.testing.assert_frame_equal(frame, before)
+
+@pytest.mark.parametrize("options", CASES)
+def test_append_matches_bulk_load(options):
+    frame = history(1, n=800, **options)
+    half = len(frame) // 2
+    rolling = alvya.RollingUsage.from_frame(frame.iloc[:half])
+    for row in frame.iloc[half:].itertuples():
+        rolling.append(row.time, row.acpu, row.agpu, row.amem)
+    expected = pandas_rolling(frame)
+    assert_same(expected, rolling.frame())
+    assert_same(expected, alvya.RollingUsage.from_frame(frame).frame())
+    current = rolling.current()
+    np.testing.assert_allclose([current[c] for c in COLUMNS], expected[COLUMNS].iloc[-1].to_numpy(dtype=float), atol=1e-4)
+
+@pytest.mark.parametrize("options", CASES)
+def test_extend_arrays_in_chunks_matches_pandas(options):
+    frame = history(2, **options)
+    times = pd.to_datetime(frame["time"]).to_numpy(dtype="datetime64[ns]").view(np.int64)
+    values = frame[COLUMNS].to_numpy(dtype=np.float32)
+    rolling = alvya.RollingUsage(capacity=16)
+    for lo in range(0, len(frame), 173):
+        rolling.extend_arrays(times[lo:lo + 173], values[lo:lo + 173])
+    assert_same(pandas_rolling(frame), rolling.frame())
+
+def test_window_max_tracks_current_window():
+    frame = history(3, n=600, nans=True)
+    rolling = alvya.RollingUsage()
+    for row in frame.itertuples():
+        rolling.append(row.time, row.acpu, row.agpu, row.amem)
+    times = pd.to_datetime(frame["time"])
+    window = frame[times > times.iloc[-1] - pd.Timedelta("5Min")]
+    maxes = rolling.window_max()
+    for c in COLUMNS:
+        assert maxes[c] == pytest.approx(window[c].max(), abs=1e-4)
+
+def test_compact_keeps_the_window():
+    frame = history(4, n=1500, nans=True)
+    expected = pandas_rolling(frame)
+    rolling = alvya.RollingUsage()
+    rolling.extend(frame.iloc[:1000])
+    rolling.compact()
+    assert rolling.size < 1000
+    for row in frame.iloc[1000:1200].itertuples():
+        rolling.append(row.time, row.acpu, row.agpu, row.amem)
+    rolling.compact()
+    rolling.extend(frame.iloc[1200:])
+    # compaction drops rows that can no longer change the window, so only the tail of the frame remains
+    actual = rolling.frame()
+    assert_same(expected.iloc[len(expected) - len(actual):].reset_index(drop=True), actual)
+    current = rolling.current()
+    np.testing.assert_allclose([current[c] for c in COLUMNS], expected[COLUMNS].iloc[-1].to_numpy(dtype=float), atol=1e-4)
+    window = frame[pd.to_datetime(frame["time"]) > pd.to_datetime(frame["time"]).iloc[-1] - pd.Timedelta("5Min")]
+    maxes = rolling.window_max()
+    for c in COLUMNS:
+        assert maxes[c] == pytest.approx(window[c].max(), abs=1e-4)
+
+def test_append_rejects_out_of_order_rows():
+    rolling = alvya.RollingUsage()
+    rolling.append(pd.Timestamp("2025-03-05 10:00:00"), 1, 1, 1)
+    with pytest.raises(ValueError):
+        rolling.append(pd.Timestamp("2025-03-05 09:59:59"), 1, 1, 1)
+
+def test_calculate_rolling_usage_from_store(tmp_path):
+    frame = history(5, n=1000, nans=True)
+    store = alvya.HistoryStore(str(tmp_path), retention=10 ** 10)
+    store.extend(frame)
+    expected = pandas_rolling(frame)
+    assert_same(expected, alvya.calculate_rolling_usage(store))
+    start, end = pd.Timestamp(expected["time"].iloc[300]), pd.Timestamp(expected["time"].iloc[700])
+    ranged = expected[(expected["time"] >= start) & (expected["time"] <= end)].reset_index(drop=True)
+    assert_same(ranged, alvya.calculate_rolling_usage(store, start, end))